@@ -1,7 +1,9 @@
 # streamlit_app.py
 import streamlit as st
-import requests
 from utils import local_css, call_llama_3
+from instrumentation import set_page
+
+set_page("Home")
 
 st.set_page_config(
     page_title="Healy AI - Your Health Companion",
@@ -24,7 +26,7 @@ to diet planning, Healy is your all-in-one solution for a healthier lifestyle.
 
 # Get a friendly welcome message from Llama 3
 welcome_prompt = "Generate a short, friendly welcome message for a health monitoring app named Healy, emphasizing its role as a personal health companion. Just provide the message."
-welcome_message = call_llama_3(welcome_prompt, 500)
+welcome_message = call_llama_3(welcome_prompt, 500, cache=True)
 if welcome_message:
     st.info(welcome_message)
 
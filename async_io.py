@@ -0,0 +1,57 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Blocking I/O (pooled HTTP session, SQL connector) runs on this shared executor
+MAX_WORKERS = 16
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(max_workers=MAX_WORKERS):
+    """Return the process-wide I/O executor, creating it on first use"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="async-io")
+    return _executor
+
+
+def submit(func, *args, **kwargs):
+    """Start a blocking call on the I/O executor with the caller's context variables; returns a Future"""
+    return get_executor().submit(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Await a blocking call on the I/O executor, keeping the caller's context variables (e.g. the page label)"""
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), call)
+
+
+async def gather_calls(*calls, return_exceptions=False):
+    """Run coroutines and zero-argument callables concurrently, returning results in order"""
+    awaitables = [
+        call if asyncio.iscoroutine(call) else call() if asyncio.iscoroutinefunction(call) else run_blocking(call)
+        for call in calls
+    ]
+    return await asyncio.gather(*awaitables, return_exceptions=return_exceptions)
+
+
+def run(coroutine):
+    """Run a coroutine to completion from synchronous code, even if this thread already has a running loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    # A loop is already running here: use a fresh one on another thread
+    return get_executor().submit(contextvars.copy_context().run, asyncio.run, coroutine).result()
+
+
+def gather(*calls, return_exceptions=False):
+    """Synchronous entry point: run independent calls concurrently and return their results in order"""
+    return run(gather_calls(*calls, return_exceptions=return_exceptions))
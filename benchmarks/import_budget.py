@@ -0,0 +1,87 @@
+"""Check that each page's module-level imports load within a cold-start budget.
+
+    python benchmarks/import_budget.py [--budget 1.5] [--runs 3] [--top 8]
+
+Every page's top-level imports run in a fresh interpreter; the fastest of
+``--runs`` timings is compared against ``--budget`` seconds and the slowest
+modules from ``python -X importtime`` are listed. Exits with status 1 when a
+page is over budget, so it can gate a deploy.
+"""
+import argparse
+import ast
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGES = [ROOT / "Home.py"] + sorted((ROOT / "pages").glob("*.py"))
+
+
+def page_imports(path):
+    """The module-level import statements of a page, as source lines"""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def cold_import_seconds(code, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def import_times(code):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                            check=True, capture_output=True, text=True)
+    return result.stderr.splitlines()
+
+
+def slowest_modules(code, top, startup_modules):
+    """(cumulative seconds, module) for the slowest imports reported by -X importtime"""
+    rows = []
+    for line in import_times(code):
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        # Only modules imported directly by the page; nested imports are indented further
+        if not module.startswith("  ") and module.strip() not in startup_modules:
+            rows.append((int(cumulative) / 1e6, module.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=float, default=1.5, help="seconds allowed per page, interpreter start included")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per page (fastest is used)")
+    parser.add_argument("--top", type=int, default=8, help="slowest modules to list for pages over budget")
+    args = parser.parse_args(argv)
+
+    baseline = cold_import_seconds("pass", args.runs)
+    startup_modules = {line.split("|")[-1].strip() for line in import_times("pass")}
+    print(f"{'interpreter start':<40}{baseline:>8.2f}s")
+    over_budget = []
+    for path in PAGES:
+        code = "\n".join(page_imports(path))
+        try:
+            seconds = cold_import_seconds(code, args.runs)
+        except subprocess.CalledProcessError as e:
+            print(f"{path.name:<40}{'failed':>9}\n{e.stderr.decode(errors='replace').strip()}")
+            over_budget.append(path.name)
+            continue
+        status = "ok" if seconds <= args.budget else "OVER BUDGET"
+        print(f"{path.name:<40}{seconds:>8.2f}s  {status}")
+        if seconds > args.budget:
+            over_budget.append(path.name)
+            for module_seconds, module in slowest_modules(code, args.top, startup_modules):
+                print(f"    {module:<36}{module_seconds:>8.2f}s")
+
+    if over_budget:
+        print(f"{len(over_budget)} page(s) over the {args.budget:.2f}s import budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
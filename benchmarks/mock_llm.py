@@ -0,0 +1,127 @@
+"""Local mock of the OpenAI-style chat completions endpoint used by llm_client.
+
+    python benchmarks/mock_llm.py --port 8765 --latency 0.2 --token-delay 0.01
+
+Replies after ``latency`` seconds; streamed replies (``"stream": true``) are
+sent as server-sent events, one word every ``token_delay`` seconds. Prompts
+asking for one day of a meal plan get a valid JSON day, so the Diet Planner
+pipeline can be driven end to end.
+"""
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DAY_PROMPT_RE = re.compile(r"Generate day (\d+) of a 7-day meal plan")
+
+GENERIC_REPLY = (
+    "Based on the information provided, here is a short assessment. Most of the listed items are common "
+    "and generally considered safe in normal amounts. Watch the sodium and added sugar content, keep "
+    "portions moderate, and talk to a healthcare professional if you have specific concerns."
+)
+
+
+def meal_plan_day(day):
+    meals = [
+        {"meal": meal, "food": f"Mock {meal.lower()} {day}", "calories": calories, "protein": 20 + day,
+         "carbs": 45, "fat": 12}
+        for meal, calories in (("Breakfast", 450), ("Lunch", 650), ("Dinner", 700))
+    ]
+    return json.dumps({"meals": meals})
+
+
+def reply_for(messages):
+    prompt = messages[-1].get("content", "") if messages else ""
+    match = DAY_PROMPT_RE.search(prompt)
+    return meal_plan_day(int(match.group(1))) if match else GENERIC_REPLY
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        server = self.server
+        with server.stats_lock:
+            server.requests += 1
+        time.sleep(server.latency)
+        reply = reply_for(body.get("messages", []))
+
+        if not body.get("stream"):
+            payload = json.dumps({"choices": [{"message": {"role": "assistant", "content": reply}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for word in re.findall(r"\S+\s*", reply):
+            time.sleep(server.token_delay)
+            self._chunk(f"data: {json.dumps({'choices': [{'delta': {'content': word}}]})}\n\n")
+        self._chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, text):
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.05, token_delay=0.005):
+        super().__init__(("127.0.0.1", port), MockLLMHandler)
+        self.latency = latency
+        self.token_delay = token_delay
+        self.requests = 0
+        self.stats_lock = threading.Lock()
+        self._thread = None
+
+    def handle_error(self, request, client_address):
+        # Clients closing keep-alive connections at shutdown are expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/serving-endpoints/mock/invocations"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds before the first byte of a reply")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="seconds between streamed words")
+    args = parser.parse_args(argv)
+
+    server = MockLLMServer(args.port, args.latency, args.token_delay)
+    print(f"Mock chat endpoint on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Check that the reminder notification queue coalesces, deduplicates and retries.
+
+    python benchmarks/notification_check.py [--burst 1000] [--recipients 50]
+
+Runs notifications.NotificationQueue against notifications.FakeTransport with
+short windows, so no email is sent. Each check prints ok or FAILED with the
+queue's stats; a burst of ``--burst`` reminders over ``--recipients`` users
+reports how many sends they collapse into. Exits with status 1 when a check
+fails.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from notifications import FakeTransport, NotificationQueue  # noqa: E402
+
+SUBJECT = "Medication Reminder"
+
+
+def wait_for(queue, sent, timeout=5.0):
+    """Wait until the flusher has sent or given up on ``sent`` messages"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = queue.stats()
+        if stats["sent"] + stats["failed"] >= sent:
+            return stats
+        time.sleep(0.01)
+    return queue.stats()
+
+
+def check_coalesce_and_dedupe():
+    """Reminders for one recipient within the window go out as one message, repeats are dropped"""
+    transport = FakeTransport()
+    queue = NotificationQueue(transport, coalesce_window=0.2)
+    accepted = [queue.enqueue("a@example.com", SUBJECT, body)
+                for body in ("Take Aspirin", "Take Metformin", "Take Aspirin")]
+    stats = wait_for(queue, 1)
+    queue.close()
+    ok = (accepted == [True, True, False]
+          and transport.sent == [("a@example.com", SUBJECT, "Take Aspirin\nTake Metformin")]
+          and stats["coalesced"] == 1 and stats["deduplicated"] == 1)
+    return ok, stats
+
+
+def check_retry():
+    """A transport failing twice is retried and the message still goes out once"""
+    transport = FakeTransport(fail_times=2)
+    queue = NotificationQueue(transport, coalesce_window=0.0, backoff_base=0.01)
+    queue.enqueue("a@example.com", SUBJECT, "Take Aspirin")
+    stats = wait_for(queue, 1)
+    queue.close()
+    ok = len(transport.sent) == 1 and stats["retried"] == 2 and stats["sent"] == 1 and stats["failed"] == 0
+    return ok, stats
+
+
+def check_give_up():
+    """A transport that keeps failing is given up on after max_retries"""
+    transport = FakeTransport(fail_times=10)
+    queue = NotificationQueue(transport, coalesce_window=0.0, max_retries=2, backoff_base=0.01)
+    queue.enqueue("a@example.com", SUBJECT, "Take Aspirin")
+    stats = wait_for(queue, 1)
+    queue.close()
+    ok = not transport.sent and stats["retried"] == 2 and stats["failed"] == 1
+    return ok, stats
+
+
+def check_burst(burst, recipients):
+    """A burst across many recipients becomes one send per recipient"""
+    transport = FakeTransport()
+    queue = NotificationQueue(transport, workers=4, coalesce_window=0.5)
+    started = time.perf_counter()
+    for i in range(burst):
+        queue.enqueue(f"user{i % recipients}@example.com", SUBJECT, f"Take dose {i}")
+    queue.flush()
+    seconds = time.perf_counter() - started
+    stats = queue.stats()
+    queue.close()
+    print(f"    {burst} reminders -> {len(transport.sent)} sends in {seconds * 1000:.1f} ms")
+    ok = len(transport.sent) == recipients and stats["coalesced"] == burst - recipients
+    return ok, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--burst", type=int, default=1000, help="reminders enqueued in the burst check")
+    parser.add_argument("--recipients", type=int, default=50, help="distinct recipients in the burst check")
+    args = parser.parse_args(argv)
+
+    checks = [
+        ("coalesce and dedupe", check_coalesce_and_dedupe),
+        ("retry", check_retry),
+        ("give up", check_give_up),
+        ("burst", lambda: check_burst(args.burst, args.recipients))
+    ]
+    failed = []
+    for name, check in checks:
+        ok, stats = check()
+        counts = {key: stats[key] for key in ("enqueued", "deduplicated", "coalesced", "sent", "retried", "failed")}
+        print(f"{name:<24}{'ok' if ok else 'FAILED':<8}{counts}")
+        if not ok:
+            failed.append(name)
+
+    if failed:
+        print(f"{len(failed)} notification check(s) failed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
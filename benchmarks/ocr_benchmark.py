@@ -0,0 +1,66 @@
+"""Compare raw Tesseract OCR with the preprocessing pipeline in ocr.py on the label images in samples/.
+
+    python benchmarks/ocr_benchmark.py [--repeat 3]
+
+Accuracy is word recall against samples/<name>.txt when such a file exists.
+"""
+import argparse
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image
+import pytesseract
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ocr import ocr_image  # noqa: E402
+
+SAMPLES = ROOT / "samples"
+
+
+def words(text):
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def recall(text, expected):
+    expected_words = words(expected)
+    return len(words(text) & expected_words) / len(expected_words) if expected_words else None
+
+
+def time_ocr(function, image, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        text = function(image)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per image and method (median is reported)")
+    args = parser.parse_args(argv)
+
+    methods = {
+        "raw": pytesseract.image_to_string,
+        "pipeline": ocr_image,
+    }
+    print(f"{'image':<32}{'method':<10}{'seconds':>10}{'chars':>8}{'recall':>8}")
+    for path in sorted(SAMPLES.glob("*.jp*g")) + sorted(SAMPLES.glob("*.png")):
+        expected_path = path.with_suffix(".txt")
+        expected = expected_path.read_text() if expected_path.exists() else None
+        image = Image.open(path)
+        image.load()
+        for name, function in methods.items():
+            seconds, text = time_ocr(function, image, args.repeat)
+            score = recall(text, expected) if expected else None
+            score_text = f"{score:.0%}" if score is not None else "-"
+            print(f"{path.name:<32}{name:<10}{seconds:>10.3f}{len(text):>8}{score_text:>8}")
+
+
+if __name__ == "__main__":
+    main()
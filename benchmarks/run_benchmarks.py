@@ -0,0 +1,285 @@
+"""Latency and throughput benchmarks for the app's page logic, without live services.
+
+    python benchmarks/run_benchmarks.py [--iterations 50] [--concurrency 4] [--only tracker]
+                                        [--latency 0.05] [--token-delay 0.005] [--sql-latency 0.01]
+                                        [--json results.json] [--compare baseline.json]
+
+The serving endpoint is replaced by benchmarks/mock_llm.py and the
+workspace.AI_GLADIATORS tables by benchmarks/sqlite_warehouse.py. Each scenario
+calls the same modules the pages use, with the files in samples/ as inputs,
+and reports p50/p95/p99 latency and throughput.
+"""
+import argparse
+import json
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from conversation import ConversationContext  # noqa: E402
+from db_pool import ConnectionPool  # noqa: E402
+from food_extraction import extract_text  # noqa: E402
+from food_prompt import InspectorPrompt  # noqa: E402
+from health_metrics import save_summary  # noqa: E402
+from health_store import MetricsCache, query_metrics, upsert_metrics  # noqa: E402
+from ingredient_index import get_ingredient_index  # noqa: E402
+from llm_cache import ResponseCache, make_key  # noqa: E402
+from llm_client import LLMClient  # noqa: E402
+from meal_plan_parser import parse_meal_plan  # noqa: E402
+from meal_plan_store import insert_meal_plans  # noqa: E402
+from meal_planner import generate_meal_plan  # noqa: E402
+from reminder_scheduler import load_schedules  # noqa: E402
+
+from mock_llm import MockLLMServer  # noqa: E402
+from sqlite_warehouse import connector  # noqa: E402
+
+SAMPLES = ROOT / "samples"
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(function, iterations, concurrency):
+    """Run function iterations times on concurrency threads and summarise the latencies"""
+    def timed(i):
+        started = time.perf_counter()
+        function(i)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(timed, range(iterations)))
+    else:
+        latencies = [timed(i) for i in range(iterations)]
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "throughput": iterations / elapsed
+    }
+
+
+def seed_health_metrics(connect, days):
+    rng = np.random.default_rng(0)
+    start = date.today() - timedelta(days=days)
+    systolic = rng.integers(105, 150, days)
+    diastolic = rng.integers(65, 95, days)
+    df = pd.DataFrame({
+        'Date': [start + timedelta(days=i) for i in range(days)],
+        'Weight': np.round(75 + np.cumsum(rng.normal(0, 0.1, days)), 1),
+        'Blood Pressure': [f"{s}/{d}" for s, d in zip(systolic, diastolic)],
+        'Heart Rate': rng.integers(58, 95, days),
+        'BP_Systolic': systolic,
+        'BP_Diastolic': diastolic
+    })
+    with connect() as connection:
+        upsert_metrics(connection, df, batch_size=500)
+
+
+def seed_reminders(connect, count):
+    with connect() as connection:
+        with connection.cursor() as cursor:
+            for i in range(count):
+                cursor.execute(
+                    "INSERT INTO workspace.AI_GLADIATORS.medication_reminders "
+                    "(medication, dosage, frequency, time, user_email) VALUES (?, ?, ?, ?, ?)",
+                    (f"Medication {i}", "10mg", "Daily", f"{i % 24:02d}:{i % 60:02d}", f"user{i % 10}@example.com")
+                )
+        connection.commit()
+
+
+def sample_meal_plan_text(days=7):
+    lines = []
+    for day in range(1, days + 1):
+        lines.append(f"Day {day}:")
+        for meal, calories in (("Breakfast", 450), ("Lunch", 650), ("Dinner", 700)):
+            lines.append(f"- {meal}: Dish {day}{meal[0]} | Calories: {calories} | Protein: 25g | Carbs: 50g | Fat: 15g")
+    return "\n".join(lines)
+
+
+def build_scenarios(args, workdir):
+    """Scenario name -> callable(i), plus cleanup callables"""
+    server = MockLLMServer(latency=args.latency, token_delay=args.token_delay).start()
+    client = LLMClient(server.url, "benchmark-token", pool_size=max(10, args.concurrency * 2))
+    response_cache = ResponseCache(max_size=256, ttl=None)
+
+    connect = connector(str(workdir / "warehouse.db"), latency=args.sql_latency)
+    seed_health_metrics(connect, args.history_days)
+    seed_reminders(connect, 200)
+    pool = ConnectionPool(connect, min_size=1, max_size=max(4, args.concurrency))
+    metrics_cache = MetricsCache(pool.checkout, ttl=300)
+    metrics_cache.load()
+
+    label_text = (SAMPLES / "FoodContent.txt").read_text()
+    pdf_bytes = (SAMPLES / "FoodContent.pdf").read_bytes()
+    image_bytes = (SAMPLES / "FoodContent.jpg").read_bytes()
+    meal_plan_text = sample_meal_plan_text()
+    inspector_history = [{"role": "assistant", "content": "Hi, I'm your food inspector AI!"}]
+    for turn in range(6):
+        inspector_history.append({"role": "user", "content": label_text * 20, "kind": "document"})
+        inspector_history.append({"role": "assistant", "content": "Findings " * 200})
+    inspector_prompt = InspectorPrompt("You're a food inspector.")
+
+    def complete(prompt, max_tokens):
+        return client.chat([{"role": "user", "content": prompt}], max_tokens=max_tokens)
+
+    def assistant_chat(i):
+        conversation = ConversationContext(system_prompt="You are a health assistant.")
+        conversation.add("user", f"How much water should I drink per day? ({i})")
+        client.chat(conversation.messages(), max_tokens=300)
+
+    def assistant_stream(i):
+        for _ in client.stream_chat([{"role": "user", "content": f"Tips for better sleep ({i})"}], max_tokens=300):
+            pass
+
+    def assistant_cached(i):
+        # Ten distinct prompts, so most calls are cache hits as with repeated symptom checks
+        prompt = f"Common causes of headache, variant {i % 10}"
+        key = make_key(prompt, 300)
+        if response_cache.get(key) is None:
+            response_cache.set(key, complete(prompt, 300))
+
+    def tracker_save(i):
+        day = date.today() + timedelta(days=i + 1)
+        reading = pd.DataFrame({
+            'Date': [day], 'Weight': [74.5], 'Blood Pressure': ["118/78"], 'Heart Rate': [70],
+            'BP_Systolic': [118], 'BP_Diastolic': [78]
+        })
+        with pool.checkout() as connection:
+            upsert_metrics(connection, reading)
+        metrics_cache.apply_write(reading)
+        summary = metrics_cache.summary
+        with pool.checkout() as connection:
+            save_summary(connection, summary)
+
+    def tracker_trends(i):
+        with pool.checkout() as connection:
+            query_metrics(connection, start=date.today() - timedelta(days=365), granularity="week")
+
+    def tracker_history_page(i):
+        with pool.checkout() as connection:
+            query_metrics(connection, limit=50, offset=(i % 10) * 50, descending=True)
+
+    def tracker_summary(i):
+        summary = metrics_cache.summary
+        summary.rolling_means()
+        summary.slopes()
+
+    def diet_plan(i):
+        plan, _ = generate_meal_plan(complete, f"Cuisine {i}", "Vegetarian", 2000, 90, start_date=date.today())
+        with pool.checkout() as connection:
+            insert_meal_plans(connection, plan)
+
+    def diet_parse(i):
+        parse_meal_plan(meal_plan_text, "Indian", date.today(), datetime.now())
+
+    def reminder_load(i):
+        load_schedules(pool.checkout)
+
+    def inspector_extract_txt(i):
+        extract_text(label_text.encode(), "text/plain")
+
+    def inspector_extract_pdf(i):
+        extract_text(pdf_bytes, "application/pdf")
+
+    def inspector_extract_image(i):
+        extract_text(image_bytes, "image/jpeg")
+
+    def inspector_index(i):
+        get_ingredient_index().analyze(label_text)
+
+    def inspector_prompt_build(i):
+        inspector_prompt.build(inspector_history, f"Is this safe? ({i})")
+
+    scenarios = {
+        "assistant_chat": assistant_chat,
+        "assistant_stream": assistant_stream,
+        "assistant_cached": assistant_cached,
+        "tracker_save": tracker_save,
+        "tracker_trends": tracker_trends,
+        "tracker_history_page": tracker_history_page,
+        "tracker_summary": tracker_summary,
+        "diet_plan": diet_plan,
+        "diet_parse": diet_parse,
+        "reminder_load": reminder_load,
+        "inspector_extract_txt": inspector_extract_txt,
+        "inspector_extract_pdf": inspector_extract_pdf,
+        "inspector_index": inspector_index,
+        "inspector_prompt": inspector_prompt_build,
+    }
+    if shutil.which("tesseract"):
+        scenarios["inspector_extract_image"] = inspector_extract_image
+    else:
+        print("tesseract not found, skipping inspector_extract_image", file=sys.stderr)
+
+    cleanup = [client.close, pool.close, server.stop]
+    return scenarios, cleanup
+
+
+def print_results(results, baseline=None):
+    header = f"{'scenario':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>10}"
+    if baseline:
+        header += f"{'p95 vs base':>14}"
+    print(header)
+    for name, result in results.items():
+        line = (f"{name:<24}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+                f"{result['p99_ms']:>10.1f}{result['throughput']:>10.1f}")
+        if baseline and name in baseline:
+            change = result["p95_ms"] / baseline[name]["p95_ms"] - 1 if baseline[name]["p95_ms"] else 0.0
+            line += f"{change:>+14.0%}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4, help="threads issuing requests at once")
+    parser.add_argument("--only", action="append", default=[], help="run scenarios whose name starts with this")
+    parser.add_argument("--latency", type=float, default=0.05, help="mock endpoint seconds before replying")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="mock endpoint seconds between streamed words")
+    parser.add_argument("--sql-latency", type=float, default=0.01, help="simulated warehouse round trip per statement")
+    parser.add_argument("--history-days", type=int, default=730, help="days of seeded health readings")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="results file from an earlier run to compare p95 against")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        scenarios, cleanup = build_scenarios(args, Path(workdir))
+        try:
+            results = {}
+            for name, function in scenarios.items():
+                if args.only and not any(name.startswith(prefix) for prefix in args.only):
+                    continue
+                function(-1)  # warm-up: imports, connections, caches
+                results[name] = measure(function, args.iterations, args.concurrency)
+        finally:
+            for close in cleanup:
+                close()
+
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_results(results, baseline)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""SQLite stand-in for the workspace.AI_GLADIATORS tables on the Databricks SQL warehouse.
+
+Connections behave like databricks-sql connections for the statements the app
+issues: cursors are context managers, ``?`` parameters are used as is, the
+catalog/schema prefix is dropped, and the MERGE upserts and date_trunc
+aggregation are rewritten into SQLite equivalents.
+"""
+import re
+import sqlite3
+import time
+from datetime import date, datetime
+
+import pandas as pd
+
+SCHEMA_PREFIX = "workspace.AI_GLADIATORS."
+
+TABLES = {
+    "health_metrics": """
+        CREATE TABLE IF NOT EXISTS health_metrics (
+            Date DATE PRIMARY KEY, Weight REAL, Blood_Pressure TEXT, Heart_Rate REAL,
+            BP_Systolic REAL, BP_Diastolic REAL
+        )
+    """,
+    "health_metrics_summary": """
+        CREATE TABLE IF NOT EXISTS health_metrics_summary (
+            Id INTEGER PRIMARY KEY, Last_Date DATE, Readings INTEGER, State TEXT
+        )
+    """,
+    "meal_plans": """
+        CREATE TABLE IF NOT EXISTS meal_plans (
+            date DATE, meal TEXT, food TEXT, calories REAL, protein REAL, carbs REAL, fat REAL,
+            cuisine TEXT, created_at TIMESTAMP, user_id TEXT
+        )
+    """,
+    "medication_reminders": """
+        CREATE TABLE IF NOT EXISTS medication_reminders (
+            medication TEXT, dosage TEXT, frequency TEXT, time TEXT, user_email TEXT
+        )
+    """,
+}
+
+# MERGE ... USING (SELECT * FROM VALUES (...), (...) AS source(cols)) ... -> INSERT OR REPLACE
+_MERGE_VALUES_RE = re.compile(
+    r"MERGE INTO (?P<table>\w+) AS target\s+USING \(\s*SELECT \* FROM VALUES (?P<values>.*?) "
+    r"AS source\((?P<columns>[^)]*)\)\s*\) AS source.*",
+    re.DOTALL
+)
+# MERGE ... USING (SELECT expr AS col, ...) AS source ... -> INSERT OR REPLACE
+_MERGE_SELECT_RE = re.compile(
+    r"MERGE INTO (?P<table>\w+) AS target\s+USING \(SELECT (?P<select>.*?)\) AS source.*",
+    re.DOTALL
+)
+_CAST_DATE_TRUNC_RE = re.compile(r"CAST\((date_trunc\([^)]*\))\s+AS DATE\)")
+
+
+def translate(statement):
+    """Rewrite a Databricks SQL statement issued by the app into SQLite"""
+    statement = statement.replace(SCHEMA_PREFIX, "")
+    match = _MERGE_VALUES_RE.search(statement)
+    if match:
+        return f"INSERT OR REPLACE INTO {match['table']} ({match['columns']}) VALUES {match['values']}"
+    match = _MERGE_SELECT_RE.search(statement)
+    if match:
+        pairs = [item.rsplit(" AS ", 1) for item in match["select"].split(",")]
+        columns = ", ".join(name.strip() for _, name in pairs)
+        values = ", ".join(expression.strip() for expression, _ in pairs)
+        return f"INSERT OR REPLACE INTO {match['table']} ({columns}) VALUES ({values})"
+    return _CAST_DATE_TRUNC_RE.sub(r"\1", statement)
+
+
+def _date_trunc(unit, value):
+    day = date.fromisoformat(str(value)[:10])
+    unit = unit.upper()
+    if unit == "WEEK":
+        day = date.fromordinal(day.toordinal() - day.weekday())
+    elif unit == "MONTH":
+        day = day.replace(day=1)
+    return day.isoformat()
+
+
+def _concat(*values):
+    return "".join("" if value is None else str(value) for value in values)
+
+
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, datetime.isoformat)
+sqlite3.register_adapter(pd.Timestamp, lambda value: value.isoformat())
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda value: datetime.fromisoformat(value.decode()))
+
+
+class Cursor:
+    def __init__(self, cursor, latency):
+        self._cursor = cursor
+        self._latency = latency
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def execute(self, statement, parameters=()):
+        if self._latency:
+            time.sleep(self._latency)
+        self._cursor.execute(translate(statement), list(parameters or ()))
+        return self
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+
+class Connection:
+    """databricks-sql style connection over a SQLite database file"""
+
+    def __init__(self, path, latency=0.0):
+        # Autocommit like the warehouse; concurrent writers wait on the lock instead of failing
+        self._connection = sqlite3.connect(
+            path, timeout=30, isolation_level=None, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False
+        )
+        self._connection.create_function("date_trunc", 2, _date_trunc, deterministic=True)
+        self._connection.create_function("concat", -1, _concat, deterministic=True)
+        self.latency = latency
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def cursor(self):
+        return Cursor(self._connection.cursor(), self.latency)
+
+    def commit(self):
+        self._connection.commit()
+
+    def close(self):
+        self._connection.close()
+
+
+def create_tables(path):
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    with connection:
+        for ddl in TABLES.values():
+            connection.execute(ddl)
+    connection.close()
+
+
+def connector(path, latency=0.0):
+    """A ``connect()`` callable for the pool and stores, creating the tables on first use"""
+    create_tables(path)
+    return lambda: Connection(path, latency)
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+# Plot width assumptions for charts drawn with use_container_width in a wide layout
+HALF_WIDTH_PX = 700
+FULL_WIDTH_PX = 1400
+# Above this many points per chart, plotly draws with WebGL (scattergl) instead of SVG
+WEBGL_THRESHOLD = 1000
+# Markers only help when individual readings can still be told apart
+MARKER_THRESHOLD = 200
+
+
+def lttb_indices(x, y, threshold):
+    """Indices of the points kept by largest-triangle-three-buckets downsampling.
+
+    The first and last points are always kept; every bucket in between
+    contributes the point forming the largest triangle with the previously
+    kept point and the average of the next bucket.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_start, next_stop = stop, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[next_start:next_stop].mean()
+        next_y = y[next_start:next_stop].mean()
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + int(np.nanargmax(area)) if np.isfinite(area).any() else start
+        indices[bucket + 1] = previous
+    return indices
+
+
+def downsample(df, x, columns, max_points):
+    """Rows of df covering every series in columns within roughly max_points per series.
+
+    The kept rows of each series are combined, so multi-series charts share one
+    frame. When no reduction is needed df itself is returned, not a copy.
+    """
+    if len(df) <= max_points:
+        return df
+    x_values = pd.to_datetime(df[x]).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    keep = np.unique(np.concatenate([
+        lttb_indices(x_values, df[column].to_numpy(dtype=np.float64, na_value=np.nan), max_points)
+        for column in columns
+    ]))
+    return df.iloc[keep]
+
+
+def line_chart(df, x, y, width_px=HALF_WIDTH_PX, **options):
+    """px.line of df downsampled to about one point per pixel, using WebGL for dense series"""
+    import plotly.express as px
+
+    columns = y if isinstance(y, list) else [y]
+    data = downsample(df, x, columns, width_px)
+    points = len(data) * len(columns)
+    return px.line(
+        data,
+        x=x,
+        y=y,
+        markers=len(data) <= MARKER_THRESHOLD,
+        render_mode="webgl" if points > WEBGL_THRESHOLD else "svg",
+        **options
+    )
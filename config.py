@@ -0,0 +1,84 @@
+import os
+import threading
+
+SECRETS_SECTION = "db_credentials"
+
+_TRUE = {"1", "true", "yes", "on"}
+
+
+def load_secrets(section=SECRETS_SECTION):
+    """The [db_credentials] table of the Streamlit secrets, or {} when there is none"""
+    try:
+        import streamlit as st
+        return dict(st.secrets[section])
+    except Exception:
+        return {}
+
+
+class AppConfig:
+    """Process-wide settings: Streamlit secrets first, then environment variables of the same name.
+
+    Read once per process and shared by every session, standalone scripts
+    included, instead of being copied into each session's state.
+    """
+
+    def __init__(self, values=None):
+        self._values = dict(values or {})
+
+    def get(self, name, default=None):
+        if name in self._values:
+            return self._values[name]
+        return os.environ.get(name, default)
+
+    def __getitem__(self, name):
+        value = self.get(name)
+        if value is None:
+            raise KeyError(f"Missing setting {name}: add it under [{SECRETS_SECTION}] in the secrets or set it in the environment")
+        return value
+
+    def flag(self, name, default=False):
+        value = self.get(name, default)
+        if isinstance(value, str):
+            return value.strip().lower() in _TRUE
+        return bool(value)
+
+    @property
+    def databricks_host(self):
+        return self.get("DATABRICKS_HOST")
+
+    @property
+    def databricks_http_path(self):
+        return self.get("DATABRICKS_HTTP_PATH")
+
+    @property
+    def databricks_token(self):
+        return self.get("DATABRICKS_TOKEN")
+
+    @property
+    def serving_endpoint(self):
+        return self.get("DATABRICKS_SERVING_ENDPOINT")
+
+    def sql_connect(self, **options):
+        """Open a Databricks SQL warehouse connection; the connector is only imported here"""
+        from databricks import sql
+
+        return sql.connect(
+            server_hostname=self["DATABRICKS_HOST"],
+            http_path=self["DATABRICKS_HTTP_PATH"],
+            access_token=self["DATABRICKS_TOKEN"],
+            **options
+        )
+
+
+_config = None
+_config_lock = threading.Lock()
+
+
+def get_config():
+    """Return the process-wide config, reading the secrets on first use"""
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                _config = AppConfig(load_secrets())
+    return _config
@@ -0,0 +1,97 @@
+import math
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English text)"""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def message_tokens(message):
+    # Small per-message overhead for the role tag and separators
+    return estimate_tokens(message["content"]) + 4
+
+
+def extractive_summary(summary, turns, max_tokens):
+    """Fallback summary: keep the head of each folded turn, trimmed to max_tokens"""
+    lines = [summary] if summary else []
+    for turn in turns:
+        content = turn["content"]
+        if len(content) > 200:
+            content = content[:200] + "..."
+        lines.append(f"{turn['role'].title()}: {content}")
+    text = "\n".join(lines)
+    max_chars = max_tokens * 4
+    return text[-max_chars:] if len(text) > max_chars else text
+
+
+class ConversationContext:
+    """Sliding window of recent chat turns plus a rolling summary of older ones.
+
+    ``add`` only records a turn. ``compact`` folds the oldest turns into the
+    summary with ``summarizer(summary, turns)``, which should return the updated
+    summary text. It runs once the window (or ``token_budget``) is exceeded and
+    then folds down to half the window, so the summarizer is called once every
+    few exchanges rather than on every turn. Call it after the reply has been
+    shown; until then ``messages`` trims to the budget on its own. When no
+    summarizer is given, or it returns nothing, an extractive summary is used
+    instead.
+    """
+
+    def __init__(self, token_budget=2000, window=8, summary_budget=300, system_prompt=None, summarizer=None):
+        self.token_budget = token_budget
+        self.window = window
+        self.summary_budget = summary_budget
+        self.system_prompt = system_prompt
+        self.summarizer = summarizer
+        self.summary = ""
+        self.turns = []
+
+    def add(self, role, content):
+        self.turns.append({"role": role, "content": content or ""})
+
+    def clear(self):
+        self.summary = ""
+        self.turns = []
+
+    def _fixed_messages(self):
+        messages = []
+        if self.system_prompt:
+            messages.append({"role": "system", "content": self.system_prompt})
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"})
+        return messages
+
+    def _tokens(self):
+        return sum(message_tokens(m) for m in self._fixed_messages() + self.turns)
+
+    def _over_budget(self):
+        return len(self.turns) > self.window or self._tokens() > self.token_budget
+
+    def compact(self):
+        """Fold the oldest turns into the summary once the window is exceeded; returns whether it did"""
+        if len(self.turns) <= 1 or not self._over_budget():
+            return False
+        # Fold down to half the window (and within the budget), always keeping the latest turn verbatim
+        keep = max(1, self.window // 2)
+        folded = []
+        while len(self.turns) > 1 and (len(self.turns) > keep or self._tokens() > self.token_budget):
+            folded.append(self.turns.pop(0))
+        summary = self.summarizer(self.summary, folded) if self.summarizer else None
+        self.summary = summary or extractive_summary(self.summary, folded, self.summary_budget)
+        return True
+
+    def messages(self):
+        """Role-tagged messages to send, trimmed to fit the token budget"""
+        fixed = self._fixed_messages()
+        budget = self.token_budget - sum(message_tokens(m) for m in fixed)
+        recent = []
+        for turn in reversed(self.turns):
+            cost = message_tokens(turn)
+            if recent and cost > budget:
+                break
+            recent.insert(0, turn)
+            budget -= cost
+        # Chat endpoints expect the first non-system message to come from the user
+        while len(recent) > 1 and recent[0]["role"] != "user":
+            recent.pop(0)
+        return fixed + recent
@@ -0,0 +1,190 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from instrumentation import REGISTRY, TimedCursor
+
+
+class PoolExhausted(Exception):
+    pass
+
+
+class _PooledConnection:
+    def __init__(self, connection):
+        self.connection = connection
+        self.created = time.monotonic()
+        self.last_used = self.created
+
+
+class ConnectionProxy:
+    """Wraps a pooled connection so ``with`` blocks and close() return it to the pool"""
+
+    def __init__(self, pool, pooled):
+        self._pool = pool
+        self._pooled = pooled
+
+    def __getattr__(self, name):
+        return getattr(self._pooled.connection, name)
+
+    def cursor(self, *args, **kwargs):
+        # Statements run through pooled connections are timed per SQL verb
+        return TimedCursor(self._pooled.connection.cursor(*args, **kwargs))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # A connection that saw an error may be broken, so don't hand it out again
+        self.close(discard=exc_type is not None)
+
+    def close(self, discard=False):
+        if self._pooled is not None:
+            self._pool.release(self._pooled, discard=discard)
+            self._pooled = None
+
+
+class ConnectionPool:
+    """Thread-safe pool of DB-API connections with health checks and idle eviction"""
+
+    def __init__(self, connect, min_size=1, max_size=10, idle_timeout=300.0, max_lifetime=3600.0,
+                 checkout_timeout=30.0, health_check_interval=60.0):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._size = 0
+        self.in_use = 0
+
+    def _open(self):
+        with self._lock:
+            if self._size >= self.max_size:
+                return None
+            self._size += 1
+        try:
+            return _PooledConnection(self._connect())
+        except Exception:
+            with self._lock:
+                self._size -= 1
+            raise
+
+    def _discard(self, pooled):
+        with self._lock:
+            self._size -= 1
+        try:
+            pooled.connection.close()
+        except Exception:
+            pass
+
+    def _healthy(self, pooled):
+        now = time.monotonic()
+        if self.max_lifetime and now - pooled.created > self.max_lifetime:
+            return False
+        if now - pooled.last_used < self.health_check_interval:
+            return True
+        try:
+            with pooled.connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                pooled = self._open()
+                if pooled is None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolExhausted(f"No connection available within {self.checkout_timeout}s")
+                    try:
+                        pooled = self._idle.get(timeout=remaining)
+                    except queue.Empty:
+                        continue
+            if self._healthy(pooled):
+                break
+            self._discard(pooled)
+        with self._lock:
+            self.in_use += 1
+        return pooled
+
+    def release(self, pooled, discard=False):
+        with self._lock:
+            self.in_use -= 1
+        if discard:
+            self._discard(pooled)
+            return
+        pooled.last_used = time.monotonic()
+        self._idle.put(pooled)
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of a ``with`` block"""
+        with self.checkout() as proxy:
+            yield proxy
+
+    def checkout(self):
+        """Check out a connection that is returned to the pool when closed or used as a context manager"""
+        return ConnectionProxy(self, self.acquire())
+
+    def evict_idle(self):
+        """Close connections idle longer than idle_timeout, keeping at least min_size open"""
+        keep = []
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            idle = time.monotonic() - pooled.last_used
+            if idle > self.idle_timeout and self._size > self.min_size:
+                self._discard(pooled)
+            else:
+                keep.append(pooled)
+        for pooled in reversed(keep):
+            self._idle.put(pooled)
+
+    def start_reaper(self, interval=60.0):
+        """Run evict_idle periodically on a daemon thread"""
+        def reap():
+            while True:
+                time.sleep(interval)
+                self.evict_idle()
+        thread = threading.Thread(target=reap, name="db-pool-reaper", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        with self._lock:
+            return {"size": self._size, "in_use": self.in_use, "idle": self._idle.qsize(), "max_size": self.max_size}
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(connect, **options):
+    """Return the process-wide connection pool, creating it (and its idle reaper) on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(connect, **options)
+                _pool.start_reaper()
+                REGISTRY.register_collector("db_pool", _pool.stats)
+    return _pool
@@ -0,0 +1,196 @@
+import hashlib
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from instrumentation import REGISTRY, record_cache, timed
+from llm_cache import ResponseCache
+
+# PyMuPDF, Pillow and the OCR stack are imported on first use, keeping page start-up fast
+
+IMAGE_TYPES = ["image/png", "image/jpeg", "image/jpg"]
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+INGREDIENTS_RE = re.compile(r"\bingredients?\b", re.IGNORECASE)
+# Headings that usually follow the ingredients list on a label or spec sheet
+SECTION_END_RE = re.compile(
+    r"\b(nutrition(al)?\s+(information|facts|values)|allergens?|storage|directions|best before|manufactured)\b",
+    re.IGNORECASE
+)
+
+# Documents with more pages than this are extracted in a process pool
+PARALLEL_PAGE_THRESHOLD = 16
+PAGES_PER_TASK = 4
+# Worker processes shared by every session and upload
+PDF_WORKERS = min(4, os.cpu_count() or 1)
+OCR_DPI = 300
+
+
+def page_text(page):
+    """Text of one PDF page, falling back to OCR when the page has no text layer"""
+    text = page.get_text()
+    if text.strip():
+        return text
+    from PIL import Image
+    from ocr import ocr_image
+
+    pixmap = page.get_pixmap(dpi=OCR_DPI)
+    image = Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+    image.info["dpi"] = (OCR_DPI, OCR_DPI)
+    return ocr_image(image, find_ingredients=False)
+
+
+def _extract_page_range(path, start, stop):
+    # Runs in a worker process, which opens its own handle on the spooled file
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as doc:
+        return [page_text(doc[number]) for number in range(start, stop)]
+
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+
+def get_pdf_pool():
+    """Return the process-wide PDF worker pool, creating it on first use.
+
+    Workers come from a forkserver (spawn where that is unavailable): forking
+    the Streamlit server, which runs many threads, can deadlock the child.
+    """
+    global _pdf_pool
+    if _pdf_pool is None:
+        with _pdf_pool_lock:
+            if _pdf_pool is None:
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context(method))
+    return _pdf_pool
+
+
+def _discard_pdf_pool(pool):
+    # A worker died; the next document gets a fresh pool
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is pool:
+            _pdf_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_pdf_pages(data):
+    """Yield the text of each PDF page in order.
+
+    Small documents are read serially. Larger ones are spooled to a temporary
+    file and extracted PAGES_PER_TASK pages at a time in the shared process
+    pool; when the caller stops iterating, pages not yet started are cancelled.
+    """
+    import fitz  # PyMuPDF
+
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        page_count = doc.page_count
+        if page_count <= PARALLEL_PAGE_THRESHOLD:
+            for page in doc:
+                yield page_text(page)
+            return
+
+    spooled = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+    pool = get_pdf_pool()
+    futures = []
+    try:
+        with spooled:
+            spooled.write(data)
+        futures = [
+            pool.submit(_extract_page_range, spooled.name, start, min(start + PAGES_PER_TASK, page_count))
+            for start in range(0, page_count, PAGES_PER_TASK)
+        ]
+        for future in futures:
+            yield from future.result()
+    except BrokenProcessPool:
+        _discard_pdf_pool(pool)
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
+        # Ranges already running still read the spooled file
+        wait(futures)
+        os.remove(spooled.name)
+
+
+@timed("extract.pdf")
+def extract_text_from_pdf(data, stop_after_ingredients=True):
+    """Extract text from PDF bytes page by page.
+
+    With stop_after_ingredients, extraction ends once an ingredients section
+    has been found and closed by a following heading (or by the end of the
+    next page), so long spec sheets are not read to the end.
+    """
+    texts = []
+    ingredients_page = None
+    for number, text in enumerate(iter_pdf_pages(data)):
+        texts.append(text)
+        if not stop_after_ingredients:
+            continue
+        if ingredients_page is None:
+            match = INGREDIENTS_RE.search(text)
+            if match is None:
+                continue
+            ingredients_page = number
+            text = text[match.end():]
+        if SECTION_END_RE.search(text) or number > ingredients_page:
+            break
+    return "".join(texts)
+
+
+@timed("extract.image")
+def extract_text_from_image(data):
+    """Extract text from image bytes with Tesseract OCR, reading the ingredients panel when it can be found"""
+    from PIL import Image
+    from ocr import ocr_image
+
+    return ocr_image(Image.open(BytesIO(data)))
+
+
+def extract_text(data, mime_type, cache=None):
+    """Extract text from an uploaded file's bytes, reusing cached results for identical content"""
+    key = f"{mime_type}:{content_hash(data)}"
+    if cache is not None:
+        cached = cache.get(key)
+        record_cache("extraction", cached is not None)
+        if cached is not None:
+            return cached
+
+    if mime_type == "application/pdf":
+        text = extract_text_from_pdf(data)
+    elif mime_type == "text/plain":
+        text = str(data, "utf-8")
+    elif mime_type in IMAGE_TYPES:
+        text = extract_text_from_image(data)
+    else:
+        raise ValueError(f"Unsupported file type: {mime_type}")
+
+    if cache is not None:
+        cache.set(key, text)
+    return text
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_extraction_cache(**options):
+    """Return the process-wide extraction cache (an LRU keyed by content hash), creating it on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(**options)
+                REGISTRY.register_collector("extraction_cache", _cache.stats)
+    return _cache
@@ -0,0 +1,105 @@
+from conversation import estimate_tokens
+from food_extraction import INGREDIENTS_RE
+
+
+def truncate_tokens(text, max_tokens):
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rstrip() + " [...]"
+
+
+def compress_document(text, max_tokens):
+    """Short stand-in for an older uploaded document: its ingredients section if found, else its head"""
+    match = INGREDIENTS_RE.search(text)
+    excerpt = text[match.start():] if match else text
+    return "[Earlier label, trimmed] " + truncate_tokens(" ".join(excerpt.split()), max_tokens)
+
+
+def fit_document(text, max_tokens):
+    """The newest document within max_tokens: whole if it fits, else anchored on its ingredients section.
+
+    The section is kept first; whatever budget is left goes to the head of the
+    document (product name, description) ahead of it.
+    """
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    match = INGREDIENTS_RE.search(text)
+    if match is None:
+        return truncate_tokens(text, max_tokens)
+    section = truncate_tokens(text[match.start():], max_tokens)
+    head_chars = max_chars - len(section) - len(" [...] ")
+    head = text[:min(head_chars, match.start())].rstrip() if head_chars > 0 else ""
+    if len(head) == match.start():
+        return head + section
+    return (head + " [...] " if head else "[...] ") + section
+
+
+class InspectorPrompt:
+    """Builds the Food Inspector prompt from the chat history within a token budget.
+
+    The most recent uploaded document is always kept (up to
+    ``document_budget``, cut around its ingredients section when longer), older documents are cut down to their ingredients
+    section, other messages are capped at ``message_budget``, and the oldest
+    messages are dropped once ``token_budget`` is reached. Rendered segments
+    are memoised, so the unchanged history is not re-processed on every turn.
+    """
+
+    def __init__(self, system_prompt, token_budget=3000, document_budget=1500,
+                 old_document_budget=150, message_budget=400):
+        self.system_prompt = system_prompt
+        self.token_budget = token_budget
+        self.document_budget = document_budget
+        self.old_document_budget = old_document_budget
+        self.message_budget = message_budget
+        self._segments = {}
+
+    def _segment(self, message, content, mode):
+        key = (message["role"], mode, content)
+        segment = self._segments.get(key)
+        if segment is None:
+            if mode == "document":
+                body = fit_document(content, self.document_budget)
+            elif mode == "old_document":
+                body = compress_document(content, self.old_document_budget)
+            else:
+                body = truncate_tokens(content, self.message_budget)
+            text = f"{message['role']}\n{body}"
+            segment = (text, estimate_tokens(text))
+            self._segments[key] = segment
+        return segment
+
+    def build(self, messages, latest=None):
+        """Prompt string for messages; ``latest`` replaces the content of the final message"""
+        documents = [i for i, message in enumerate(messages) if message.get("kind") == "document"]
+        latest_document = documents[-1] if documents else None
+
+        segments = []
+        for i, message in enumerate(messages):
+            content = latest if latest is not None and i == len(messages) - 1 else message["content"]
+            if i == latest_document:
+                mode = "document"
+            elif message.get("kind") == "document":
+                mode = "old_document"
+            else:
+                mode = "message"
+            segments.append(self._segment(message, content, mode))
+
+        # The final message and the newest document are always sent; older
+        # messages fill the remaining budget newest first
+        required = {len(segments) - 1, latest_document}
+        budget = self.token_budget - estimate_tokens(self.system_prompt)
+        budget -= sum(segments[i][1] for i in required if i is not None)
+        kept = set(required)
+        for i in range(len(segments) - 1, -1, -1):
+            if i in required:
+                continue
+            if segments[i][1] > budget:
+                break
+            kept.add(i)
+            budget -= segments[i][1]
+        return "\n".join([self.system_prompt] + [text for i, (text, _) in enumerate(segments) if i in kept])
+
+    def clear(self):
+        self._segments.clear()
@@ -0,0 +1,202 @@
+import json
+import threading
+from collections import Counter, deque
+
+import numpy as np
+import pandas as pd
+
+HEALTH_SUMMARY_TABLE = "workspace.AI_GLADIATORS.health_metrics_summary"
+
+# Numeric columns of the metrics frame that are aggregated
+METRICS = ['Weight', 'Heart Rate', 'BP_Systolic', 'BP_Diastolic']
+WINDOWS = (7, 30, 90)
+EWMA_ALPHA = 0.3
+
+BP_CATEGORIES = ["Normal", "Elevated", "Stage 1 Hypertension", "Stage 2 Hypertension"]
+BP_LEVELS = {"Normal": "success", "Elevated": "warning", "Stage 1 Hypertension": "warning", "Stage 2 Hypertension": "error"}
+
+
+def bp_category(systolic, diastolic):
+    """Blood pressure category for scalar readings or for whole arrays/columns at once"""
+    systolic = np.asarray(systolic, dtype=float)
+    diastolic = np.asarray(diastolic, dtype=float)
+    conditions = [
+        (systolic < 120) & (diastolic < 80),
+        (systolic < 130) & (diastolic < 80),
+        (systolic < 140) | (diastolic < 90)
+    ]
+    categories = np.select(conditions, BP_CATEGORIES[:3], default=BP_CATEGORIES[3])
+    return categories.item() if categories.ndim == 0 else categories
+
+
+def as_date(value):
+    return pd.Timestamp(value).date()
+
+
+class HealthSummary:
+    """Running aggregates over health readings, updated in O(1) per new reading.
+
+    Keeps the latest values, rolling means over the last ``windows`` days
+    (relative to the newest reading), an EWMA per metric, least-squares slopes
+    per day and BP category counts. Readings must arrive in Date order; ``add``
+    returns False for one it cannot apply incrementally (an older Date, or a
+    changed value for the newest Date), and the caller rebuilds from the frame.
+    """
+
+    def __init__(self, windows=WINDOWS, alpha=EWMA_ALPHA):
+        self.windows = tuple(windows)
+        self.alpha = alpha
+        self.count = 0
+        self.first_date = None
+        self.last_date = None
+        self.latest = {}
+        self.ewma = {}
+        self.category_counts = Counter()
+        # n, sum x, sum y, sum xy, sum xx per metric, x in days since first_date
+        self._regression = {metric: [0.0] * 5 for metric in METRICS}
+        self._recent = {window: deque() for window in self.windows}
+        self._window_sums = {window: dict.fromkeys(METRICS, 0.0) for window in self.windows}
+
+    @classmethod
+    def from_frame(cls, df, **options):
+        summary = cls(**options)
+        for row in df.sort_values('Date').to_dict('records'):
+            summary.add(row)
+        return summary
+
+    def add(self, row):
+        """Fold one reading (a metrics frame row as a dict) into the aggregates"""
+        day = as_date(row['Date'])
+        values = {metric: float(row[metric]) for metric in METRICS}
+        if self.last_date is not None and day <= self.last_date:
+            return day == self.last_date and values == self.latest
+
+        if self.first_date is None:
+            self.first_date = day
+        self.last_date = day
+        self.count += 1
+        self.latest = values
+        self.category_counts[bp_category(values['BP_Systolic'], values['BP_Diastolic'])] += 1
+
+        x = float((day - self.first_date).days)
+        for metric, y in values.items():
+            previous = self.ewma.get(metric)
+            self.ewma[metric] = y if previous is None else self.alpha * y + (1 - self.alpha) * previous
+            sums = self._regression[metric]
+            sums[0] += 1
+            sums[1] += x
+            sums[2] += y
+            sums[3] += x * y
+            sums[4] += x * x
+
+        ordinal = day.toordinal()
+        for window in self.windows:
+            recent, window_sums = self._recent[window], self._window_sums[window]
+            recent.append((ordinal, values))
+            for metric, y in values.items():
+                window_sums[metric] += y
+            while recent[0][0] <= ordinal - window:
+                _, expired = recent.popleft()
+                for metric, y in expired.items():
+                    window_sums[metric] -= y
+        return True
+
+    def rolling_means(self):
+        """{window: {metric: mean}} over readings in the last ``window`` days"""
+        return {
+            window: {metric: total / len(self._recent[window]) for metric, total in self._window_sums[window].items()}
+            for window in self.windows if self._recent[window]
+        }
+
+    def slopes(self):
+        """Least-squares change per day for each metric, or None with fewer than two distinct days"""
+        slopes = {}
+        for metric, (n, sx, sy, sxy, sxx) in self._regression.items():
+            denominator = n * sxx - sx * sx
+            slopes[metric] = (n * sxy - sx * sy) / denominator if n >= 2 and denominator else None
+        return slopes
+
+    @property
+    def tracking_days(self):
+        return (self.last_date - self.first_date).days if self.count else 0
+
+    def to_json(self):
+        return json.dumps({
+            "windows": self.windows,
+            "alpha": self.alpha,
+            "count": self.count,
+            "first_date": self.first_date.isoformat() if self.first_date else None,
+            "last_date": self.last_date.isoformat() if self.last_date else None,
+            "latest": self.latest,
+            "ewma": self.ewma,
+            "category_counts": dict(self.category_counts),
+            "regression": self._regression,
+            "recent": {str(window): list(recent) for window, recent in self._recent.items()},
+            "window_sums": {str(window): sums for window, sums in self._window_sums.items()}
+        })
+
+    @classmethod
+    def from_json(cls, text):
+        state = json.loads(text)
+        summary = cls(windows=state["windows"], alpha=state["alpha"])
+        summary.count = state["count"]
+        summary.first_date = as_date(state["first_date"]) if state["first_date"] else None
+        summary.last_date = as_date(state["last_date"]) if state["last_date"] else None
+        summary.latest = state["latest"]
+        summary.ewma = state["ewma"]
+        summary.category_counts = Counter(state["category_counts"])
+        summary._regression = state["regression"]
+        summary._recent = {int(window): deque(map(tuple, recent)) for window, recent in state["recent"].items()}
+        summary._window_sums = {int(window): sums for window, sums in state["window_sums"].items()}
+        return summary
+
+
+_summary_table_ready = False
+_summary_table_lock = threading.Lock()
+
+
+def ensure_summary_table(connection):
+    """Create the summary table if it does not exist yet; runs the DDL once per process"""
+    global _summary_table_ready
+    if _summary_table_ready:
+        return
+    with _summary_table_lock:
+        if not _summary_table_ready:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {HEALTH_SUMMARY_TABLE} "
+                    "(Id INT, Last_Date DATE, Readings INT, State STRING)"
+                )
+            _summary_table_ready = True
+
+
+def save_summary(connection, summary):
+    """Store the serialised summary as the single row of the summary table"""
+    ensure_summary_table(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            MERGE INTO {HEALTH_SUMMARY_TABLE} AS target
+            USING (SELECT 1 AS Id, ? AS Last_Date, ? AS Readings, ? AS State) AS source
+            ON target.Id = source.Id
+            WHEN MATCHED THEN UPDATE SET *
+            WHEN NOT MATCHED THEN INSERT *
+            """,
+            [summary.last_date, summary.count, summary.to_json()]
+        )
+    connection.commit()
+
+
+def load_summary(connection):
+    """Return the stored summary, or None when nothing is stored"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT State FROM {HEALTH_SUMMARY_TABLE} WHERE Id = 1")
+        row = cursor.fetchone()
+    return HealthSummary.from_json(row[0]) if row else None
+
+
+def delete_summary(connection):
+    ensure_summary_table(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {HEALTH_SUMMARY_TABLE}")
+    connection.commit()
@@ -0,0 +1,239 @@
+import threading
+import time
+
+import pandas as pd
+
+from health_metrics import HealthSummary, load_summary, as_date
+
+HEALTH_METRICS_TABLE = "workspace.AI_GLADIATORS.health_metrics"
+
+# Application column names mapped to their table column names
+HEALTH_COLUMNS = {
+    'Date': 'Date',
+    'Weight': 'Weight',
+    'Blood Pressure': 'Blood_Pressure',
+    'Heart Rate': 'Heart_Rate',
+    'BP_Systolic': 'BP_Systolic',
+    'BP_Diastolic': 'BP_Diastolic'
+}
+
+
+def merge_metrics_sql(row_count):
+    """MERGE statement upserting row_count parameterised rows keyed on Date"""
+    columns = list(HEALTH_COLUMNS.values())
+    placeholders = ", ".join(["(" + ", ".join(["?"] * len(columns)) + ")"] * row_count)
+    return f"""
+        MERGE INTO {HEALTH_METRICS_TABLE} AS target
+        USING (
+            SELECT * FROM VALUES {placeholders} AS source({", ".join(columns)})
+        ) AS source
+        ON target.Date = source.Date
+        WHEN MATCHED THEN UPDATE SET *
+        WHEN NOT MATCHED THEN INSERT *
+    """
+
+
+def upsert_metrics(connection, data_df, batch_size=200):
+    """Upsert the given rows in multi-row MERGE batches, returning the number of rows written"""
+    # MERGE rejects several source rows matching one target row, so keep the latest per Date
+    rows = data_df.drop_duplicates('Date', keep='last')[list(HEALTH_COLUMNS)]
+    records = list(rows.astype(object).itertuples(index=False, name=None))
+    with connection.cursor() as cursor:
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            cursor.execute(merge_metrics_sql(len(batch)), [value for record in batch for value in record])
+    connection.commit()
+    return len(records)
+
+
+def rows_to_frame(rows, columns):
+    """Build an application-format metrics frame from fetched table rows"""
+    df = pd.DataFrame(rows, columns=columns)
+    return df.rename(columns={table: app for app, table in HEALTH_COLUMNS.items()})[list(HEALTH_COLUMNS)]
+
+
+# Aggregation units accepted by query_metrics, mapped to date_trunc units
+GRANULARITIES = {"day": "DAY", "week": "WEEK", "month": "MONTH"}
+
+
+def query_metrics(connection, start=None, end=None, granularity=None, limit=None, offset=0, descending=False):
+    """Fetch metrics with the date window, aggregation and paging pushed down into SQL.
+
+    ``granularity`` is None for raw rows or one of GRANULARITIES to return one
+    averaged row per period, dated at the start of the period.
+    """
+    conditions, params = [], []
+    if start is not None:
+        conditions.append("Date >= ?")
+        params.append(start)
+    if end is not None:
+        conditions.append("Date <= ?")
+        params.append(end)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    if granularity is None:
+        select = ", ".join(HEALTH_COLUMNS.values())
+        group = ""
+    else:
+        unit = GRANULARITIES[granularity]
+        select = f"""
+            CAST(date_trunc('{unit}', Date) AS DATE) AS Date,
+            avg(Weight) AS Weight,
+            concat(CAST(round(avg(BP_Systolic)) AS INT), '/', CAST(round(avg(BP_Diastolic)) AS INT)) AS Blood_Pressure,
+            avg(Heart_Rate) AS Heart_Rate,
+            avg(BP_Systolic) AS BP_Systolic,
+            avg(BP_Diastolic) AS BP_Diastolic
+        """
+        group = " GROUP BY 1"
+
+    query = f"SELECT {select} FROM {HEALTH_METRICS_TABLE}{where}{group} ORDER BY Date{' DESC' if descending else ''}"
+    if limit is not None:
+        query += f" LIMIT {int(limit)} OFFSET {int(offset)}"
+
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        columns = [column[0] for column in cursor.description]
+        return rows_to_frame(cursor.fetchall(), columns)
+
+
+def table_stats(connection):
+    """(row count, latest Date) of the metrics table, to check a cached copy against cheaply"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*), MAX(Date) FROM {HEALTH_METRICS_TABLE}")
+        count, latest = cursor.fetchone()
+    return int(count or 0), as_date(latest) if latest is not None else None
+
+
+def empty_metrics_frame():
+    return pd.DataFrame(columns=list(HEALTH_COLUMNS))
+
+
+class MetricsCache:
+    """Process-wide cache of the health metrics frame, refreshed incrementally.
+
+    After ``ttl`` seconds only rows at or after the Date watermark are fetched
+    again (the watermark day itself is re-read since it may have been upserted),
+    then the table's COUNT/MAX(Date) is compared with the merged frame; a
+    mismatch (a back-dated insert, or rows deleted by another process) triggers
+    a full reload. Every ``full_reload`` seconds the table is read in full
+    anyway, to pick up back-dated edits of existing days.
+    Local writes are applied with ``apply_write`` and ``reset`` drops everything.
+    The returned frame is shared, so callers must not modify it in place.
+
+    ``summary`` is a HealthSummary kept in step with the frame: new readings
+    are folded in one at a time, and it is only rebuilt when an older day
+    changes.
+    """
+
+    def __init__(self, connect, ttl=300.0, full_reload=3600.0):
+        self._connect = connect
+        self.ttl = ttl
+        self.full_reload = full_reload
+        self._frame = None
+        self._summary = None
+        self._summary_checked = False
+        self._loaded_at = 0.0
+        self._full_loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def watermark(self):
+        if self._frame is None or self._frame.empty:
+            return None
+        return self._frame['Date'].max()
+
+    def _fetch(self, since=None):
+        with self._connect() as connection:
+            return query_metrics(connection, start=since)
+
+    def _refresh(self):
+        """Incremental refresh, falling back to a full read when the table changed behind the watermark"""
+        watermark = self.watermark
+        if watermark is not None and time.monotonic() - self._full_loaded_at <= self.full_reload:
+            with self._connect() as connection:
+                since = query_metrics(connection, start=watermark)
+                count, latest = table_stats(connection)
+            self._merge(since)
+            if count == len(self._frame) and latest == as_date(self.watermark):
+                return
+        self._frame = self._fetch()
+        self._summary = None
+        self._full_loaded_at = time.monotonic()
+
+    def _merge(self, rows):
+        if rows.empty:
+            return
+        if self._summary is not None:
+            for row in rows.sort_values('Date').to_dict('records'):
+                if not self._summary.add(row):
+                    self._summary = None
+                    break
+        kept = self._frame[~self._frame['Date'].isin(rows['Date'])]
+        frames = [frame for frame in (kept, rows) if not frame.empty]
+        self._frame = pd.concat(frames, ignore_index=True).sort_values('Date', ignore_index=True)
+
+    def load(self):
+        with self._lock:
+            if self._frame is None:
+                self._frame = self._fetch()
+                self._loaded_at = self._full_loaded_at = time.monotonic()
+            elif time.monotonic() - self._loaded_at > self.ttl:
+                self._refresh()
+                self._loaded_at = time.monotonic()
+            return self._frame
+
+    def apply_write(self, data_df):
+        """Fold rows just written to the table into the cached frame"""
+        with self._lock:
+            if self._frame is not None:
+                self._merge(data_df.drop_duplicates('Date', keep='last')[list(HEALTH_COLUMNS)])
+
+    def reset(self):
+        """Mark the cached table as empty, e.g. after deleting all rows"""
+        with self._lock:
+            self._frame = empty_metrics_frame()
+            self._summary = HealthSummary()
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """Forget the cached frame so the next load reads the full table"""
+        with self._lock:
+            self._frame = None
+            self._summary = None
+
+    @property
+    def summary(self):
+        """Aggregates for the cached frame, rebuilt from it when needed.
+
+        On first use the stored summary is taken instead when it matches the
+        frame; later rebuilds follow local writes the stored copy has not seen.
+        """
+        frame = self.load()
+        with self._lock:
+            if self._summary is None:
+                stored = None
+                if not self._summary_checked:
+                    self._summary_checked = True
+                    try:
+                        with self._connect() as connection:
+                            stored = load_summary(connection)
+                    except Exception:
+                        stored = None
+                current = (stored is not None and stored.count == len(frame)
+                           and stored.last_date == (as_date(frame['Date'].max()) if len(frame) else None))
+                self._summary = stored if current else HealthSummary.from_frame(frame)
+            return self._summary
+
+
+_metrics_cache = None
+_metrics_cache_lock = threading.Lock()
+
+
+def get_metrics_cache(connect, **options):
+    """Return the process-wide metrics cache, creating it on first use"""
+    global _metrics_cache
+    if _metrics_cache is None:
+        with _metrics_cache_lock:
+            if _metrics_cache is None:
+                _metrics_cache = MetricsCache(connect, **options)
+    return _metrics_cache
@@ -0,0 +1,180 @@
+import csv
+import os
+import re
+import threading
+
+DEFAULT_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "ingredient_hazards.csv")
+
+HAZARD_ORDER = {"high": 0, "moderate": 1, "low": 2, "safe": 3}
+
+# Words that commonly surround an additive on a label without changing what it is
+FILLER_WORDS = {
+    "and", "or", "of", "in", "as", "with", "from", "contains", "added", "e", "ins",
+    "colour", "color", "colours", "colors", "preservative", "preservatives", "emulsifier", "emulsifiers",
+    "stabiliser", "stabilizer", "stabilisers", "stabilizers", "antioxidant", "antioxidants",
+    "flavour", "flavor", "enhancer", "enhancers", "acidity", "regulator", "regulators", "acidulant",
+    "raising", "agent", "agents", "thickener", "thickeners", "sweetener", "sweeteners",
+    "artificial", "natural", "nature", "identical", "permitted", "synthetic", "food", "class", "ii",
+    "anticaking", "anti", "caking", "glazing", "humectant", "treatment", "improver", "flour",
+}
+
+_E_NUMBER_RE = re.compile(r"\b(?:e|ins)[\s\-]?(\d{3,4}[a-z]?)\b")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_SPLIT_RE = re.compile(r"[,;:()\[\]{}\n•·]|\s-\s|\.\s")
+_PREFIX_RE = re.compile(r"^\s*ingredients?\s*[:\-]?", re.IGNORECASE)
+_PERCENT_RE = re.compile(r"\d+(?:\.\d+)?\s*%")
+# A bare additive code such as "150d" inside "Colour (150d)"
+_BARE_CODE_RE = re.compile(r"\d{3,4}[a-z]?", re.IGNORECASE)
+# A bracketed additive code labelling the class name before it: "Colour (150d)", "Preservative (INS 211)"
+_CODE_IN_PARENS_RE = re.compile(r"\s*\(\s*(?:(?:e|ins)[\s\-]?)?(\d{3,4}[a-z]?)\s*\)", re.IGNORECASE)
+
+
+def normalize(text):
+    """Lowercase, canonicalise E/INS numbers (``INS 621``, ``E-621`` -> ``e621``) and strip punctuation"""
+    text = text.lower().replace("&", " and ")
+    text = _E_NUMBER_RE.sub(lambda match: f" e{match.group(1)} ", text)
+    return text
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def split_ingredients(text):
+    """Split an ingredient list into individual items, dropping percentages and the leading "Ingredients:" """
+    text = _PERCENT_RE.sub(" ", _PREFIX_RE.sub("", text))
+    # Keep a class name and its code in one item, so the code explains the class name
+    text = _CODE_IN_PARENS_RE.sub(lambda match: f" E{match.group(1)}", text)
+    return [item.strip(" .*") for item in _SPLIT_RE.split(text) if item.strip(" .*")]
+
+
+def looks_like_ingredient_list(text, min_items=3):
+    """True for label text (several separated items) rather than a free-form question"""
+    return len(split_ingredients(text)) >= min_items
+
+
+def mostly_known(text, unknown, min_share=0.5):
+    """True when at least min_share of the items in text were recognised (unknown is what analyze left over)"""
+    items = split_ingredients(text)
+    return bool(items) and (len(items) - len(unknown)) / len(items) >= min_share
+
+
+class IngredientIndex:
+    """Token trie over ingredient names, synonyms and E numbers from a bundled hazard table.
+
+    Lookups scan the tokenised text once, taking the longest match at each
+    position, so cost grows with the text length rather than the table size.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        self._trie = {}
+        for entry in entries:
+            names = [entry["name"], entry["e_number"]] + entry["synonyms"]
+            for name in names:
+                tokens = tokenize(name)
+                if tokens:
+                    self._add(tokens, entry)
+
+    @classmethod
+    def from_csv(cls, path=DEFAULT_TABLE):
+        with open(path, newline="", encoding="utf-8") as f:
+            entries = [
+                {
+                    "name": row["name"],
+                    "e_number": row["e_number"],
+                    "synonyms": [synonym for synonym in row["synonyms"].split("|") if synonym],
+                    "hazard": row["hazard"],
+                    "banned_in": row["banned_in"],
+                    "notes": row["notes"],
+                }
+                for row in csv.DictReader(f)
+            ]
+        return cls(entries)
+
+    def _add(self, tokens, entry):
+        node = self._trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node[None] = entry
+
+    def match_tokens(self, tokens):
+        """Yield (start, end, entry) for the longest match at each position, left to right"""
+        position = 0
+        while position < len(tokens):
+            node, match = self._trie, None
+            for end in range(position, len(tokens)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                if None in node:
+                    match = (position, end + 1, node[None])
+            if match:
+                yield match
+                position = match[1]
+            else:
+                position += 1
+
+    def lookup(self, text):
+        """Distinct table entries mentioned anywhere in text"""
+        found = {}
+        for _, _, entry in self.match_tokens(tokenize(text)):
+            found.setdefault(entry["name"], entry)
+        return list(found.values())
+
+    def analyze(self, text):
+        """Split an ingredient list into known table entries and the items the table does not cover.
+
+        An item counts as known when it matches an entry and every word not
+        covered by the match is a filler word such as "colour" or
+        "preservative"; items matching no entry (even "artificial colour") are
+        unknown.
+        """
+        known = {}
+        unknown = []
+        for item in split_ingredients(text):
+            tokens = tokenize(f"e{item}" if _BARE_CODE_RE.fullmatch(item) else item)
+            if not tokens:
+                continue
+            covered = set()
+            for start, end, entry in self.match_tokens(tokens):
+                known.setdefault(entry["name"], entry)
+                covered.update(range(start, end))
+            # Filler words only excuse the rest of an item that matched; an item matching nothing is unknown
+            leftover = [token for i, token in enumerate(tokens) if i not in covered and token not in FILLER_WORDS]
+            if not covered or leftover:
+                unknown.append(item)
+        ordered = sorted(known.values(), key=lambda entry: HAZARD_ORDER.get(entry["hazard"], len(HAZARD_ORDER)))
+        return ordered, unknown
+
+
+def format_findings(entries):
+    """Markdown summary of known ingredients, most hazardous first, with safe ones listed briefly"""
+    icons = {"high": "🔴", "moderate": "🟠", "low": "🟡"}
+    lines = []
+    safe = [entry["name"] for entry in entries if entry["hazard"] == "safe"]
+    for entry in entries:
+        if entry["hazard"] == "safe":
+            continue
+        label = entry["name"] + (f" ({entry['e_number']})" if entry["e_number"] else "")
+        line = f"- {icons.get(entry['hazard'], '⚪')} **{label}**: {entry['hazard']} concern. {entry['notes']}"
+        if entry["banned_in"]:
+            line += f" Banned or not permitted in: {entry['banned_in']}."
+        lines.append(line)
+    if safe:
+        lines.append(f"- 🟢 No known concerns: {', '.join(safe)}.")
+    return "\n".join(lines)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_ingredient_index(path=DEFAULT_TABLE):
+    """Return the process-wide index, building it from the bundled table on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = IngredientIndex.from_csv(path)
+    return _index
@@ -0,0 +1,262 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ContextDecorator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latency histogram bucket upper bounds in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PREFIX = "healy"
+
+_page = contextvars.ContextVar("page", default="")
+
+
+def set_page(name):
+    """Label everything recorded by the current script run with the page name"""
+    _page.set(name)
+
+
+def current_page():
+    return _page.get()
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate by linear interpolation inside the bucket holding the q-th observation"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for upper, count in zip(self.buckets + (float("inf"),), self.counts):
+            if count and seen + count >= rank:
+                if upper == float("inf"):
+                    return lower
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = upper
+        return lower
+
+
+class Registry:
+    """Thread-safe store of call histograms and counters, with stats pulled from collectors at export"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._counters = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def observe(self, site, seconds, error=False, **labels):
+        key = (site, labels.get("page", ""))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+        if error:
+            self.inc("errors_total", site=site, page=key[1])
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def register_collector(self, name, collect):
+        """collect() returns a dict of numeric stats, exported as gauges named after the collector"""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def collect(self):
+        stats = {}
+        for name, collect in list(self._collectors.items()):
+            try:
+                stats[name] = {key: value for key, value in collect().items() if isinstance(value, (int, float))}
+            except Exception:
+                stats[name] = {}
+        return stats
+
+    def snapshot(self):
+        """Rows per (site, page) with call counts, error counts and latency percentiles in milliseconds"""
+        with self._lock:
+            histograms = list(self._histograms.items())
+            counters = dict(self._counters)
+        rows = []
+        for (site, page), histogram in sorted(histograms):
+            errors = counters.get(("errors_total", (("page", page), ("site", site))), 0)
+            rows.append({
+                "site": site,
+                "page": page,
+                "calls": histogram.count,
+                "errors": errors,
+                "error_rate": errors / histogram.count if histogram.count else 0.0,
+                "mean_ms": histogram.sum / histogram.count * 1000 if histogram.count else None,
+                "p50_ms": histogram.quantile(0.50) * 1000 if histogram.count else None,
+                "p95_ms": histogram.quantile(0.95) * 1000 if histogram.count else None,
+                "p99_ms": histogram.quantile(0.99) * 1000 if histogram.count else None,
+            })
+        return rows
+
+    def counters(self):
+        with self._lock:
+            return {(name, labels): value for (name, labels), value in self._counters.items()}
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            histograms = [(key, list(h.counts), h.sum, h.count) for key, h in sorted(self._histograms.items())]
+            counters = sorted(self._counters.items())
+        lines = [
+            f"# HELP {PREFIX}_call_duration_seconds Latency of instrumented calls by call site and page.",
+            f"# TYPE {PREFIX}_call_duration_seconds histogram",
+        ]
+        for (site, page), counts, total, count in histograms:
+            cumulative = 0
+            for upper, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                labels = _label_text({"site": site, "page": page, "le": str(upper)})
+                lines.append(f"{PREFIX}_call_duration_seconds_bucket{labels} {cumulative}")
+            labels = _label_text({"site": site, "page": page})
+            lines.append(f"{PREFIX}_call_duration_seconds_sum{labels} {total}")
+            lines.append(f"{PREFIX}_call_duration_seconds_count{labels} {count}")
+
+        names = []
+        for (name, _), _ in counters:
+            if name not in names:
+                names.append(name)
+        for name in names:
+            lines.append(f"# TYPE {PREFIX}_{name} counter")
+            for (counter_name, labels), value in counters:
+                if counter_name == name:
+                    lines.append(f"{PREFIX}_{name}{_label_text(dict(labels))} {value}")
+
+        for collector, stats in sorted(self.collect().items()):
+            for key, value in sorted(stats.items()):
+                lines.append(f"# TYPE {PREFIX}_{collector}_{key} gauge")
+                lines.append(f"{PREFIX}_{collector}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+REGISTRY = Registry()
+
+
+class timed(ContextDecorator):
+    """Record the latency and failures of a block or function under a call site name.
+
+        with timed("sql.query"):
+            ...
+
+        @timed("ocr.tesseract")
+        def read(image):
+            ...
+    """
+
+    def __init__(self, site, registry=None):
+        self.site = site
+        self.registry = registry or REGISTRY
+        self._started = threading.local()
+
+    def __enter__(self):
+        self._started.__dict__.setdefault("stack", []).append(time.perf_counter())
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        started = self._started.stack.pop()
+        # A consumer abandoning a timed generator early is not a failure
+        error = exc_type is not None and not issubclass(exc_type, GeneratorExit)
+        self.registry.observe(self.site, time.perf_counter() - started, error=error, page=current_page())
+        return False
+
+
+def record_tokens(site, prompt_tokens, completion_tokens, registry=None):
+    registry = registry or REGISTRY
+    page = current_page()
+    registry.inc("prompt_tokens_total", prompt_tokens, site=site, page=page)
+    registry.inc("completion_tokens_total", completion_tokens, site=site, page=page)
+
+
+def record_cache(cache, hit, registry=None):
+    (registry or REGISTRY).inc("cache_requests_total", cache=cache, result="hit" if hit else "miss", page=current_page())
+
+
+class TimedCursor:
+    """DB-API cursor wrapper timing each statement under ``sql.<verb>``"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cursor.close()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, operation, *args, **kwargs):
+        verb = operation.split(None, 1)[0].lower() if operation.strip() else "statement"
+        with timed(f"sql.{verb}"):
+            return self._cursor.execute(operation, *args, **kwargs)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        payload = self.server.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port, host="127.0.0.1", registry=None):
+    """Serve /metrics for Prometheus on a background thread, once per process"""
+    global _server
+    if _server is None:
+        with _server_lock:
+            if _server is None:
+                server = ThreadingHTTPServer((host, port), _MetricsHandler)
+                server.daemon_threads = True
+                server.registry = registry or REGISTRY
+                threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+                _server = server
+    return _server
@@ -0,0 +1,115 @@
+import json
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class LLMClient:
+    """Pooled, keep-alive HTTP client for the OpenAI-style serving endpoint"""
+
+    def __init__(self, endpoint, token, pool_size=10, connect_timeout=5.0, read_timeout=120.0,
+                 max_retries=3, backoff_base=0.5, backoff_max=8.0, verify=False):
+        self.endpoint = endpoint
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.verify = verify
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json"
+        })
+
+    def _backoff(self, attempt, retry_after=None):
+        # Honour the server's Retry-After when given, otherwise full-jitter exponential backoff
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def post(self, payload, stream=False):
+        """POST a payload to the endpoint, retrying on 429/5xx and connection errors"""
+        attempt = 0
+        while True:
+            try:
+                response = self.session.post(
+                    self.endpoint,
+                    json=payload,
+                    timeout=self.timeout,
+                    verify=self.verify,
+                    stream=stream
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                delay = self._backoff(attempt, response.headers.get("Retry-After"))
+                response.close()
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            response.raise_for_status()
+            return response
+
+    def chat(self, messages, max_tokens=100, **params):
+        """Send chat messages and return the completion text"""
+        payload = {"messages": messages, "max_tokens": max_tokens, **params}
+        response = self.post(payload)
+        return response.json().get("choices", [{}])[0].get("message", {}).get("content", "No response content.")
+
+    def stream_chat(self, messages, max_tokens=100, **params):
+        """Send chat messages and yield completion text deltas as they arrive"""
+        payload = {"messages": messages, "max_tokens": max_tokens, "stream": True, **params}
+        with self.post(payload, stream=True) as response:
+            # Some endpoints ignore "stream" and answer with a single JSON body
+            if "text/event-stream" not in response.headers.get("Content-Type", ""):
+                content = response.json().get("choices", [{}])[0].get("message", {}).get("content")
+                if content:
+                    yield content
+                return
+
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client(endpoint, token, **options):
+    """Return the process-wide client, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = LLMClient(endpoint, token, **options)
+    return _client
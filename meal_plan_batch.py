@@ -0,0 +1,101 @@
+"""Generate and store weekly meal plans for a list of user profiles offline.
+
+Profiles are read from a CSV or JSON file with the columns
+``user_id, cuisine, diet, daily_calories, daily_protein`` (``diet`` is "Veg"
+or "Non-Veg"). Every stored or written row carries its profile's ``user_id``.
+Credentials come from the app's Streamlit secrets.
+
+    python meal_plan_batch.py profiles.csv --start-date 2026-10-19
+    python meal_plan_batch.py profiles.json --mode copy --volume /Volumes/workspace/ai_gladiators/staging
+    python meal_plan_batch.py profiles.csv --output plans.csv   # generate only, no warehouse writes
+"""
+import argparse
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pandas as pd
+
+from llm_client import LLMClient
+from meal_planner import generate_meal_plan
+from meal_plan_store import insert_meal_plans, copy_meal_plans
+
+logger = logging.getLogger("meal_plan_batch")
+
+PROFILE_COLUMNS = ["user_id", "cuisine", "diet", "daily_calories", "daily_protein"]
+
+
+def load_profiles(path):
+    profiles = pd.read_json(path, dtype={"user_id": str}) if path.endswith(".json") else pd.read_csv(path, dtype={"user_id": str})
+    missing = [column for column in PROFILE_COLUMNS if column not in profiles.columns]
+    if missing:
+        raise ValueError(f"{path} is missing the profile column(s): {', '.join(missing)}")
+    if profiles["user_id"].isna().any() or profiles["user_id"].duplicated().any():
+        raise ValueError(f"{path} needs a unique, non-empty user_id for every profile")
+    return profiles.to_dict("records")
+
+
+def generate_for_profiles(client, profiles, start_date, profile_workers, day_workers):
+    """Generate one plan per profile, running up to profile_workers profiles at once"""
+    def complete(prompt, max_tokens):
+        return client.chat([{"role": "user", "content": prompt}], max_tokens=max_tokens)
+
+    def generate(profile):
+        plan, stats = generate_meal_plan(
+            complete, profile["cuisine"], profile["diet"], int(profile["daily_calories"]),
+            int(profile["daily_protein"]), max_workers=day_workers, start_date=start_date
+        )
+        if stats["failed_days"]:
+            logger.warning("Profile %s: days %s failed", profile["user_id"], stats["failed_days"])
+        return plan.assign(user_id=str(profile["user_id"]))
+
+    with ThreadPoolExecutor(max_workers=profile_workers) as executor:
+        plans = [plan for plan in executor.map(generate, profiles) if not plan.empty]
+    return pd.concat(plans, ignore_index=True) if plans else pd.DataFrame()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute weekly meal plans for a list of user profiles.")
+    parser.add_argument("profiles", help="CSV or JSON file of profiles")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=date.today(),
+                        help="first day of the plans (default: today)")
+    parser.add_argument("--profile-workers", type=int, default=4, help="profiles generated concurrently")
+    parser.add_argument("--day-workers", type=int, default=4, help="concurrent day requests per profile")
+    parser.add_argument("--mode", choices=["insert", "copy"], default="insert",
+                        help="multi-row INSERT batches, or a staged CSV loaded with COPY INTO")
+    parser.add_argument("--batch-size", type=int, default=500, help="rows per INSERT statement")
+    parser.add_argument("--volume", help="Unity Catalog volume directory used to stage files in copy mode")
+    parser.add_argument("--output", help="write the generated plans to this CSV instead of the warehouse")
+    args = parser.parse_args(argv)
+    if args.mode == "copy" and not args.volume and not args.output:
+        parser.error("--mode copy requires --volume")
+
+    from config import get_config
+
+    logging.basicConfig(level=logging.INFO)
+    config = get_config()
+
+    client = LLMClient(config["DATABRICKS_SERVING_ENDPOINT"], config["DATABRICKS_TOKEN"],
+                       pool_size=args.profile_workers * args.day_workers)
+    profiles = load_profiles(args.profiles)
+    plans = generate_for_profiles(client, profiles, args.start_date, args.profile_workers, args.day_workers)
+    logger.info("Generated %d meals for %d profiles", len(plans), len(profiles))
+    if plans.empty:
+        return
+
+    if args.output:
+        plans.to_csv(args.output, index=False)
+        return
+
+    staging_dir = tempfile.gettempdir()
+    with config.sql_connect(staging_allowed_local_path=staging_dir) as connection:
+        if args.mode == "copy":
+            written = copy_meal_plans(connection, plans, args.volume, staging_dir)
+        else:
+            written = insert_meal_plans(connection, plans, args.batch_size)
+    logger.info("Stored %d meal plan rows", written)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import json
+import re
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+MEAL_PLAN_COLUMNS = ['Date', 'Meal', 'Food', 'Calories', 'Protein', 'Carbs', 'Fat', 'Cuisine', 'created_at']
+
+DAY_RE = re.compile(r"^\W*Day\s*(?P<day>\d+)\b", re.IGNORECASE)
+
+# Breakfast: Dish Name | Calories: X | Protein: Xg | Carbs: Xg | Fat: Xg [| Fiber: Xg ...]
+# The head is split on the first ':'; '-'/'–' separate meal and dish only when there is no ':'
+# Leading bullets and list numbers ("- ", "• ", "1. ") are not part of the meal name
+_HEAD_RE = re.compile(r"^[\s\-•]*(?:\d+[.)]\s*)?(?P<head>.*?)\s*$")
+_SPACED_DASH_RE = re.compile(r"\s+[\-–]\s+")
+_DASH_RE = re.compile(r"[\-–]")
+# One nutrient field, label optional: "Calories: 550 kcal", "~550 kcal", "Protein 20g", "20"
+_FIELD_RE = re.compile(
+    r"^\s*(?:(?P<label>[A-Za-z][A-Za-z ]*?)\s*:?\s*)?~?\s*(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>[A-Za-z]+)?\s*$",
+    re.IGNORECASE
+)
+NUTRIENTS = ['Calories', 'Protein', 'Carbs', 'Fat']
+_NUTRIENT_LABELS = {
+    'calories': 'Calories', 'calorie': 'Calories', 'kcal': 'Calories', 'energy': 'Calories',
+    'protein': 'Protein', 'proteins': 'Protein',
+    'carbs': 'Carbs', 'carb': 'Carbs', 'carbohydrates': 'Carbs', 'carbohydrate': 'Carbs',
+    'fat': 'Fat', 'fats': 'Fat', 'total fat': 'Fat',
+}
+
+
+def split_meal_head(text):
+    """(meal, food) from the text before the first '|', or None when there is no separator"""
+    head = _HEAD_RE.match(text).group("head")
+    if ":" in head:
+        meal, food = head.split(":", 1)
+    else:
+        # A spaced dash first, so "Mid-Morning Snack - Fruit bowl" keeps its hyphenated meal name
+        parts = _SPACED_DASH_RE.split(head, maxsplit=1)
+        if len(parts) != 2:
+            parts = _DASH_RE.split(head, maxsplit=1)
+        if len(parts) != 2:
+            return None
+        meal, food = parts
+    meal, food = meal.strip(), food.strip()
+    if not meal or not food or not meal[0].isalpha():
+        return None
+    return meal, food
+
+
+def parse_nutrients(fields):
+    """Calories, protein, carbs and fat from the '|' fields of a meal line.
+
+    Labelled fields are matched by label; unlabelled ones fill the remaining
+    nutrients in order. Fields with other labels (e.g. Fiber) are ignored.
+    Returns None unless all four are found.
+    """
+    values = {}
+    unlabelled = []
+    for field in fields:
+        match = _FIELD_RE.match(field.replace("*", ""))
+        if match is None:
+            return None
+        label = (match.group("label") or "").strip().lower()
+        value = float(match.group("value"))
+        if not label:
+            if (match.group("unit") or "").lower().startswith(("kcal", "cal")):
+                values.setdefault('Calories', value)
+            else:
+                unlabelled.append(value)
+        elif label in _NUTRIENT_LABELS:
+            values.setdefault(_NUTRIENT_LABELS[label], value)
+    missing = [name for name in NUTRIENTS if name not in values]
+    for name, value in zip(missing, unlabelled):
+        values[name] = value
+    if len(values) < len(NUTRIENTS):
+        return None
+    return values
+
+
+def empty_meal_plan():
+    return pd.DataFrame(columns=MEAL_PLAN_COLUMNS)
+
+
+def parse_meal_plan(text, cuisine, start_date=None, created_at=None, default_day=1):
+    """Parse an LLM meal plan in one pass over its lines.
+
+    Returns the meal plan frame and coverage stats: the number of days and
+    meals parsed, how many meal-like lines (containing "|") were seen, and the
+    lines that looked like meals but did not match.
+    """
+    start_date = start_date or datetime.now().date()
+    created_at = created_at or datetime.now()
+    columns = {name: [] for name in MEAL_PLAN_COLUMNS}
+    days = set()
+    candidates = 0
+    unparsed = []
+    day = default_day
+
+    for raw_line in text.splitlines():
+        line = raw_line.replace("*", "").strip()
+        if not line:
+            continue
+        day_match = DAY_RE.match(line)
+        if day_match and "|" not in line:
+            day = int(day_match.group("day"))
+            continue
+        if "|" not in line:
+            continue
+        candidates += 1
+        head, *fields = line.split("|")
+        meal_food = split_meal_head(head)
+        nutrients = parse_nutrients(field for field in fields if field.strip()) if meal_food else None
+        if nutrients is None:
+            unparsed.append(raw_line)
+            continue
+        days.add(day)
+        columns['Date'].append(start_date + timedelta(days=day - 1))
+        columns['Meal'].append(meal_food[0])
+        columns['Food'].append(meal_food[1])
+        columns['Calories'].append(int(nutrients['Calories']))
+        columns['Protein'].append(nutrients['Protein'])
+        columns['Carbs'].append(nutrients['Carbs'])
+        columns['Fat'].append(nutrients['Fat'])
+        columns['Cuisine'].append(cuisine)
+        columns['created_at'].append(created_at)
+
+    meals = len(columns['Meal'])
+    stats = {
+        "days": len(days),
+        "meals": meals,
+        "candidates": candidates,
+        "coverage": meals / candidates if candidates else 0.0,
+        "unparsed": unparsed
+    }
+    return pd.DataFrame(columns), stats
+
+
+def _json_block(text):
+    """First JSON object in text, ignoring any prose or code fences around it"""
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        return json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+
+
+def parse_day_json(text, day, cuisine, start_date=None, created_at=None):
+    """Parse one day of structured output: {"meals": [{"meal", "food", "calories", "protein", "carbs", "fat"}]}.
+
+    Falls back to the line-based parser (treating every meal as ``day``) when
+    the model did not return usable JSON. Returns the frame and coverage stats.
+    """
+    start_date = start_date or datetime.now().date()
+    created_at = created_at or datetime.now()
+    data = _json_block(text)
+    meals = data.get("meals") if isinstance(data, dict) else None
+    if not isinstance(meals, list):
+        return parse_meal_plan(text, cuisine, start_date, created_at, default_day=day)
+
+    columns = {name: [] for name in MEAL_PLAN_COLUMNS}
+    unparsed = []
+    for meal in meals:
+        try:
+            row = (
+                str(meal["meal"]).strip(),
+                str(meal["food"]).strip(),
+                int(float(meal["calories"])),
+                float(meal["protein"]),
+                float(meal["carbs"]),
+                float(meal["fat"])
+            )
+        except (KeyError, TypeError, ValueError):
+            unparsed.append(json.dumps(meal))
+            continue
+        for name, value in zip(['Meal', 'Food', 'Calories', 'Protein', 'Carbs', 'Fat'], row):
+            columns[name].append(value)
+        columns['Date'].append(start_date + timedelta(days=day - 1))
+        columns['Cuisine'].append(cuisine)
+        columns['created_at'].append(created_at)
+
+    parsed = len(columns['Meal'])
+    stats = {
+        "days": 1 if parsed else 0,
+        "meals": parsed,
+        "candidates": len(meals),
+        "coverage": parsed / len(meals) if meals else 0.0,
+        "unparsed": unparsed
+    }
+    return pd.DataFrame(columns), stats
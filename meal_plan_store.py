@@ -0,0 +1,70 @@
+import os
+import tempfile
+import uuid
+
+MEAL_PLANS_TABLE = "workspace.AI_GLADIATORS.meal_plans"
+
+# Application column names mapped to their table column names
+MEAL_PLAN_TABLE_COLUMNS = {
+    'Date': 'date',
+    'Meal': 'meal',
+    'Food': 'food',
+    'Calories': 'calories',
+    'Protein': 'protein',
+    'Carbs': 'carbs',
+    'Fat': 'fat',
+    'Cuisine': 'cuisine',
+    'created_at': 'created_at',
+    'user_id': 'user_id'
+}
+
+
+def table_rows(plan_df):
+    """Plan rows in table column order; user_id is NULL for plans that carry none"""
+    rows = plan_df.reindex(columns=list(MEAL_PLAN_TABLE_COLUMNS)).astype(object)
+    return rows.where(rows.notna(), None)
+
+
+def insert_meal_plans_sql(row_count):
+    columns = list(MEAL_PLAN_TABLE_COLUMNS.values())
+    placeholders = ", ".join(["(" + ", ".join(["?"] * len(columns)) + ")"] * row_count)
+    return f"INSERT INTO {MEAL_PLANS_TABLE} ({', '.join(columns)}) VALUES {placeholders}"
+
+
+def insert_meal_plans(connection, plan_df, batch_size=500):
+    """Insert meal plan rows with multi-row INSERT statements, returning the number of rows written"""
+    records = list(table_rows(plan_df).itertuples(index=False, name=None))
+    with connection.cursor() as cursor:
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            cursor.execute(insert_meal_plans_sql(len(batch)), [value for record in batch for value in record])
+    connection.commit()
+    return len(records)
+
+
+def copy_meal_plans(connection, plan_df, volume_dir, local_dir=None):
+    """Load meal plan rows by staging a CSV file in a Unity Catalog volume and running COPY INTO.
+
+    The connection must be opened with ``staging_allowed_local_path`` covering
+    ``local_dir`` (the system temp directory by default) so the PUT is allowed.
+    """
+    local_dir = local_dir or tempfile.gettempdir()
+    file_name = f"meal_plans_{uuid.uuid4().hex}.csv"
+    local_path = os.path.join(local_dir, file_name)
+    volume_path = f"{volume_dir.rstrip('/')}/{file_name}"
+
+    table_rows(plan_df).rename(columns=MEAL_PLAN_TABLE_COLUMNS).to_csv(local_path, index=False)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"PUT '{local_path}' INTO '{volume_path}' OVERWRITE")
+            cursor.execute(f"""
+                COPY INTO {MEAL_PLANS_TABLE}
+                FROM '{volume_path}'
+                FILEFORMAT = CSV
+                FORMAT_OPTIONS ('header' = 'true', 'inferSchema' = 'true')
+            """)
+            cursor.execute(f"REMOVE '{volume_path}'")
+        connection.commit()
+    finally:
+        os.remove(local_path)
+    return len(plan_df)
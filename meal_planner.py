@@ -0,0 +1,97 @@
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from meal_plan_parser import parse_day_json, parse_meal_plan, empty_meal_plan
+
+logger = logging.getLogger(__name__)
+
+
+def day_prompt(day, cuisine, diet, daily_calories, daily_protein, retry=False):
+    prompt = f"""Generate day {day} of a 7-day meal plan with 3 meals (Breakfast, Lunch, Dinner) for {cuisine} cuisine and {diet} diet.
+    The daily calorie goal is {daily_calories} calories with {daily_protein}g of protein.
+    Vary the dishes from other days of the week.
+
+    Reply with JSON only, in exactly this shape:
+    {{"meals": [{{"meal": "Breakfast", "food": "Dish Name", "calories": 0, "protein": 0, "carbs": 0, "fat": 0}}]}}
+    Give calories in kcal and protein, carbs and fat in grams, as numbers.
+    """
+    if retry:
+        prompt += "Your previous answer could not be parsed. Output the JSON object and nothing else.\n"
+    return prompt
+
+
+def is_usable_day(text):
+    """Whether a day's answer parses to at least one meal; only those are worth caching"""
+    return bool(text) and not parse_day_json(text, 1, "")[0].empty
+
+
+def is_complete_plan(text, days=7):
+    """Whether a whole-week answer parses to every day, i.e. was not cut off at max_tokens"""
+    return bool(text) and parse_meal_plan(text, "")[1]["days"] >= days
+
+
+def generate_meal_plan(complete, cuisine, diet, daily_calories, daily_protein, days=7,
+                       max_workers=4, max_attempts=2, start_date=None):
+    """Generate a meal plan with one concurrent request per day.
+
+    ``complete(prompt, max_tokens)`` returns the model's text and may raise.
+    At most ``max_workers`` requests run at once. Days whose request fails or
+    parses to no meals are requested again, up to ``max_attempts`` in total.
+    Returns the merged frame and stats with the days that still failed, and
+    the error of those whose last request raised.
+    """
+    start_date = start_date or datetime.now().date()
+    created_at = datetime.now()
+
+    def generate_day(day, retry=False):
+        try:
+            text = complete(day_prompt(day, cuisine, diet, daily_calories, daily_protein, retry), 600)
+        except Exception as e:
+            logger.exception("Meal plan request for day %s failed", day)
+            return day, None, {"error": str(e)}
+        if not text:
+            return day, None, None
+        frame, stats = parse_day_json(text, day, cuisine, start_date, created_at)
+        return day, frame, stats
+
+    frames = {}
+    unparsed = []
+    errors = {}
+    pending = list(range(1, days + 1))
+    attempts = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending and attempts < max_attempts:
+            attempts += 1
+            failed = []
+            # Each request runs in a copy of the caller's context, so its metrics keep the page label
+            futures = [
+                executor.submit(contextvars.copy_context().run, generate_day, day, attempts > 1)
+                for day in pending
+            ]
+            for day, frame, stats in (future.result() for future in futures):
+                if frame is None or frame.empty:
+                    failed.append(day)
+                    if stats and "error" in stats:
+                        errors[day] = stats["error"]
+                    else:
+                        errors.pop(day, None)
+                    continue
+                errors.pop(day, None)
+                frames[day] = frame
+                unparsed.extend(stats["unparsed"])
+            pending = failed
+
+    plan = pd.concat([frames[day] for day in sorted(frames)], ignore_index=True) if frames else empty_meal_plan()
+    stats = {
+        "days": len(frames),
+        "meals": len(plan),
+        "failed_days": pending,
+        "errors": errors,
+        "attempts": attempts,
+        "unparsed": unparsed
+    }
+    return plan, stats
@@ -0,0 +1,198 @@
+import hashlib
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+class SendGridTransport:
+    """Sends plain-text email through SendGrid, reusing one API client"""
+
+    def __init__(self, api_key, sender):
+        from sendgrid import SendGridAPIClient
+
+        self.client = SendGridAPIClient(api_key)
+        self.sender = sender
+
+    def send(self, recipient, subject, body):
+        from sendgrid.helpers.mail import Mail
+
+        message = Mail(
+            from_email=self.sender,
+            to_emails=recipient,
+            subject=subject,
+            plain_text_content=body)
+        response = self.client.send(message)
+        if response.status_code >= 400:
+            raise RuntimeError(f"SendGrid returned status {response.status_code}")
+
+
+class FakeTransport:
+    """In-memory transport that records messages instead of sending them"""
+
+    def __init__(self, fail_times=0):
+        self.sent = []
+        self.fail_times = fail_times
+        self._lock = threading.Lock()
+
+    def send(self, recipient, subject, body):
+        with self._lock:
+            if self.fail_times > 0:
+                self.fail_times -= 1
+                raise RuntimeError("Simulated transport failure")
+            self.sent.append((recipient, subject, body))
+
+
+class NotificationQueue:
+    """Outbound message queue that coalesces, deduplicates and retries.
+
+    Messages for the same recipient and subject enqueued within
+    ``coalesce_window`` seconds are merged into one message. A body line
+    already sent (or queued) to a recipient within ``dedupe_window`` seconds
+    is dropped. Sends run on a pool of ``workers`` threads and are retried
+    with jittered exponential backoff.
+    """
+
+    def __init__(self, transport, workers=2, coalesce_window=5.0, dedupe_window=3600.0,
+                 max_retries=3, backoff_base=1.0, backoff_max=30.0):
+        self.transport = transport
+        self.coalesce_window = coalesce_window
+        self.dedupe_window = dedupe_window
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="notify")
+        self._pending = {}
+        self._seen = {}
+        self._cond = threading.Condition()
+        self._stop = False
+        self._started = time.monotonic()
+        self.metrics = {
+            "enqueued": 0, "deduplicated": 0, "coalesced": 0,
+            "sent": 0, "retried": 0, "failed": 0, "send_seconds": 0.0
+        }
+        self._flusher = threading.Thread(target=self._run, name="notify-flusher", daemon=True)
+        self._flusher.start()
+
+    def _dedupe_key(self, recipient, body):
+        return hashlib.sha256(f"{recipient}\0{body}".encode("utf-8")).hexdigest()
+
+    def enqueue(self, recipient, subject, body):
+        """Queue a message; returns False if it was dropped as a duplicate"""
+        now = time.monotonic()
+        key = self._dedupe_key(recipient, body)
+        with self._cond:
+            seen_at = self._seen.get(key)
+            if seen_at is not None and now - seen_at < self.dedupe_window:
+                self.metrics["deduplicated"] += 1
+                return False
+            self._seen[key] = now
+            self.metrics["enqueued"] += 1
+            group = self._pending.get((recipient, subject))
+            if group is None:
+                self._pending[(recipient, subject)] = (now, [body])
+            else:
+                group[1].append(body)
+                self.metrics["coalesced"] += 1
+            self._cond.notify()
+        return True
+
+    def _take_ready(self, force=False):
+        now = time.monotonic()
+        ready = [key for key, (first, _) in self._pending.items()
+                 if force or now - first >= self.coalesce_window]
+        return [(key, self._pending.pop(key)[1]) for key in ready]
+
+    def _next_deadline(self):
+        if not self._pending:
+            return None
+        oldest = min(first for first, _ in self._pending.values())
+        return max(0.0, oldest + self.coalesce_window - time.monotonic())
+
+    def _has_ready(self):
+        deadline = self._next_deadline()
+        return deadline is not None and deadline <= 0
+
+    def _prune_seen(self):
+        cutoff = time.monotonic() - self.dedupe_window
+        for key in [key for key, seen_at in self._seen.items() if seen_at < cutoff]:
+            del self._seen[key]
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stop and not self._has_ready():
+                    self._cond.wait(timeout=self._next_deadline())
+                batch = self._take_ready(force=self._stop)
+                self._prune_seen()
+                stopping = self._stop
+            for (recipient, subject), bodies in batch:
+                self._executor.submit(self._send, recipient, subject, "\n".join(bodies))
+            if stopping:
+                return
+
+    def _send(self, recipient, subject, body):
+        for attempt in range(self.max_retries + 1):
+            started = time.monotonic()
+            try:
+                self.transport.send(recipient, subject, body)
+            except Exception:
+                if attempt >= self.max_retries:
+                    logger.exception("Giving up sending notification to %s", recipient)
+                    with self._cond:
+                        self.metrics["failed"] += 1
+                    return False
+                with self._cond:
+                    self.metrics["retried"] += 1
+                time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt))))
+                continue
+            with self._cond:
+                self.metrics["sent"] += 1
+                self.metrics["send_seconds"] += time.monotonic() - started
+            return True
+
+    def flush(self):
+        """Send everything pending now, without waiting for the coalesce window"""
+        with self._cond:
+            batch = self._take_ready(force=True)
+        futures = [self._executor.submit(self._send, recipient, subject, "\n".join(bodies))
+                   for (recipient, subject), bodies in batch]
+        for future in futures:
+            future.result()
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self.metrics)
+            stats["pending"] = sum(len(bodies) for _, bodies in self._pending.values())
+        elapsed = time.monotonic() - self._started
+        stats["throughput_per_min"] = stats["sent"] / elapsed * 60 if elapsed else 0.0
+        stats["avg_send_seconds"] = stats["send_seconds"] / stats["sent"] if stats["sent"] else 0.0
+        return stats
+
+    def close(self):
+        """Send whatever is still pending and stop the worker threads"""
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        self._flusher.join()
+        self._executor.shutdown(wait=True)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_notification_queue(transport_factory, **options):
+    """Return the process-wide notification queue, creating it on first use"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = NotificationQueue(transport_factory(), **options)
+                REGISTRY.register_collector("notifications", _queue.stats)
+    return _queue
@@ -0,0 +1,138 @@
+import numpy as np
+from PIL import Image, ImageOps
+import pytesseract
+
+from instrumentation import timed
+
+TARGET_DPI = 300
+# Lower declared DPIs are camera/editor defaults (phone JPEGs say 72) rather than scan resolutions
+MIN_TRUSTED_DPI = 150
+# Used when the image carries no trusted DPI: phone photos are capped, tiny crops are enlarged.
+# No image is ever resampled past MAX_SIDE on its long side.
+MAX_SIDE = 2000
+MIN_SIDE = 1000
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_STEP = 0.5
+DETECTION_SIDE = 1000
+
+# Tesseract page segmentation modes
+PSM_AUTO = 3
+PSM_BLOCK = 6
+PSM_SPARSE = 11
+
+
+def rescale(image, target_dpi=TARGET_DPI):
+    """Resample to target_dpi when a scan DPI is known, otherwise into [MIN_SIDE, MAX_SIDE] pixels on the long side"""
+    dpi = image.info.get("dpi")
+    long_side = max(image.size)
+    if dpi and dpi[0] and float(dpi[0]) >= MIN_TRUSTED_DPI:
+        scale = target_dpi / float(dpi[0])
+    elif long_side > MAX_SIDE:
+        scale = MAX_SIDE / long_side
+    elif long_side < MIN_SIDE:
+        scale = min(2.0, MIN_SIDE / long_side)
+    else:
+        return image
+    scale = min(scale, MAX_SIDE / long_side)
+    if scale == 1.0:
+        return image
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(size, Image.LANCZOS)
+
+
+def otsu_threshold(pixels):
+    """Otsu's threshold for an 8-bit grayscale array"""
+    histogram = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    total = pixels.size
+    weight_background = np.cumsum(histogram)
+    weight_foreground = total - weight_background
+    cumulative_mean = np.cumsum(histogram * np.arange(256))
+    mean_background = cumulative_mean / np.maximum(weight_background, 1)
+    mean_foreground = (cumulative_mean[-1] - cumulative_mean) / np.maximum(weight_foreground, 1)
+    between_variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+    return int(np.argmax(between_variance))
+
+
+def binarize(gray):
+    """Black text on white using Otsu's threshold"""
+    pixels = np.asarray(gray, dtype=np.uint8)
+    binary = np.where(pixels > otsu_threshold(pixels), 255, 0).astype(np.uint8)
+    # Light text on a dark panel: invert so Tesseract always sees dark text
+    if binary.mean() < 127:
+        binary = 255 - binary
+    return Image.fromarray(binary)
+
+
+def skew_angle(binary):
+    """Angle (degrees) that makes text rows horizontal, by maximising the row-profile variance"""
+    small = binary.copy()
+    small.thumbnail((800, 800))
+    ink = ImageOps.invert(small)
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-DESKEW_MAX_ANGLE, DESKEW_MAX_ANGLE + DESKEW_STEP, DESKEW_STEP):
+        rows = np.asarray(ink.rotate(angle, fillcolor=0), dtype=np.float64).sum(axis=1)
+        score = rows.var()
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def preprocess(image, target_dpi=TARGET_DPI):
+    """Rescale, grayscale, binarize and deskew an image for OCR"""
+    image = ImageOps.exif_transpose(image)
+    gray = ImageOps.autocontrast(ImageOps.grayscale(rescale(image, target_dpi)))
+    binary = binarize(gray)
+    angle = skew_angle(binary)
+    if angle:
+        binary = binary.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+    return binary
+
+
+def find_ingredients_region(image):
+    """Bounding box (left, top, right, bottom) of the text block starting with "Ingredients", or None.
+
+    Detection runs a sparse-text pass on a reduced copy, so it is much cheaper
+    than reading the whole label at full resolution.
+    """
+    small = image.copy()
+    small.thumbnail((DETECTION_SIDE, DETECTION_SIDE))
+    scale = image.width / small.width
+    with timed("ocr.detect"):
+        data = pytesseract.image_to_data(small, config=f"--psm {PSM_SPARSE}", output_type=pytesseract.Output.DICT)
+
+    anchor = next((i for i, word in enumerate(data["text"]) if word.strip().lower().startswith("ingredient")), None)
+    if anchor is None:
+        return None
+
+    # Everything from the anchor line down to the end of its block (or the next large vertical gap)
+    block = data["block_num"][anchor]
+    top = data["top"][anchor]
+    line_height = data["height"][anchor]
+    boxes = [
+        (data["left"][i], data["top"][i], data["left"][i] + data["width"][i], data["top"][i] + data["height"][i])
+        for i, word in enumerate(data["text"])
+        if word.strip() and data["block_num"][i] == block and data["top"][i] >= top - line_height
+    ]
+    left = min(box[0] for box in boxes)
+    right = max(box[2] for box in boxes)
+    bottom = max(box[3] for box in boxes)
+    margin = line_height
+    return (
+        max(0, round((left - margin) * scale)),
+        max(0, round((top - margin) * scale)),
+        min(image.width, round((right + margin) * scale)),
+        min(image.height, round((bottom + margin) * scale))
+    )
+
+
+def ocr_image(image, find_ingredients=True, target_dpi=TARGET_DPI):
+    """OCR an image after preprocessing, reading only the ingredients panel when one can be located"""
+    with timed("ocr.preprocess"):
+        processed = preprocess(image, target_dpi)
+    if find_ingredients:
+        region = find_ingredients_region(processed)
+        if region is not None:
+            with timed("ocr.tesseract"):
+                return pytesseract.image_to_string(processed.crop(region), config=f"--psm {PSM_BLOCK}")
+    with timed("ocr.tesseract"):
+        return pytesseract.image_to_string(processed, config=f"--psm {PSM_AUTO}")
@@ -1,16 +1,43 @@
 import streamlit as st
-from utils import call_llama_3
+from utils import call_llama_3, stream_llama_3
+from conversation import ConversationContext
+from instrumentation import set_page
+
+set_page("Health Assistant")
+
+# Fold older turns into a rolling summary written by the model
+def summarize_turns(summary, turns):
+    transcript = "\n".join(f"{turn['role'].title()}: {turn['content']}" for turn in turns)
+    prompt = f"""Update the running summary of a conversation between a user and a health assistant.
+    Keep symptoms, conditions, medications and advice already given. Reply with the summary only, under 150 words.
+
+    Current summary:
+    {summary or "(none)"}
+
+    New turns:
+    {transcript}
+    """
+    return call_llama_3(prompt, 300)
+
+def new_conversation():
+    return ConversationContext(token_budget=3000, window=8, summarizer=summarize_turns)
 
 # Initialize session state
 if "messages" not in st.session_state:
     st.session_state.messages = []
 if "conversation_context" not in st.session_state:
-    st.session_state.conversation_context = ""
+    st.session_state.conversation_context = new_conversation()
+
+# Function to generate response, streamed token by token
+def generate_response(messages):
+    return stream_llama_3(messages, 500)
 
-# Function to generate response
-def generate_response(prompt):
-    response = call_llama_3(prompt,500)
-    return response
+# Chat bubble markup
+def user_bubble(content):
+    return f'<div class="chat-message user"><div class="message">{content}</div><img src="https://cdn1.iconfinder.com/data/icons/avatar-2-2/512/Salesman_1-512.png" class="avatar" alt="User"></div>'
+
+def bot_bubble(content):
+    return f'<div class="chat-message bot"><img src="https://cdn0.iconfinder.com/data/icons/robot-avatar/512/Robot_Avatars_13-1024.png" class="avatar" alt="Bot"><div class="message">{content}</div></div>'
 
 # Streamlit app layout
 st.set_page_config(page_title="Health Assistant Chatbot", page_icon="🩺", layout="wide")
@@ -108,7 +135,7 @@ with st.sidebar:
     st.markdown("---")
     if st.button("Clear Conversation", key="clear"):
         st.session_state.messages = []
-        st.session_state.conversation_context = ""
+        st.session_state.conversation_context = new_conversation()
     st.markdown("---")
     st.markdown("Created with ❤️ by AI-Gladiators")
 
@@ -122,7 +149,7 @@ st.write("This chatbot assists you with basic health-related questions. Please n
 if len(st.session_state.messages) == 0:
     initial_message = "Hello! I'm your health assistant. How can I help you today?"
     st.session_state.messages.append({"role": "assistant", "content": initial_message})
-    st.session_state.conversation_context += f"Assistant: {initial_message}\n"
+    st.session_state.conversation_context.add("assistant", initial_message)
 
 # Main content
 st.markdown('<div class="main">', unsafe_allow_html=True)
@@ -131,9 +158,9 @@ st.markdown('<div class="main">', unsafe_allow_html=True)
 for message in st.session_state.messages:
     with st.container():
         if message["role"] == "user":
-            st.markdown(f'<div class="chat-message user"><div class="message">{message["content"]}</div><img src="https://cdn1.iconfinder.com/data/icons/avatar-2-2/512/Salesman_1-512.png" class="avatar" alt="User"></div>', unsafe_allow_html=True)
+            st.markdown(user_bubble(message["content"]), unsafe_allow_html=True)
         else:
-            st.markdown(f'<div class="chat-message bot"><img src="https://cdn0.iconfinder.com/data/icons/robot-avatar/512/Robot_Avatars_13-1024.png" class="avatar" alt="Bot"><div class="message">{message["content"]}</div></div>', unsafe_allow_html=True)
+            st.markdown(bot_bubble(message["content"]), unsafe_allow_html=True)
 
 
 #create a form for input
@@ -147,15 +174,23 @@ with st.form(key="chat_form", clear_on_submit=True):
 if submit_button and user_input:
     # Add user message to history
     st.session_state.messages.append({"role": "user", "content": user_input})
-    st.session_state.conversation_context += f"User: {user_input}\n"
+    st.session_state.conversation_context.add("user", user_input)
     
-    # Generate and display assistant response
+    st.markdown(user_bubble(user_input), unsafe_allow_html=True)
+
+    # Generate and display assistant response as tokens arrive
+    placeholder = st.empty()
+    assistant_response = ""
     with st.spinner("Thinking..."):
-        assistant_response = generate_response(st.session_state.conversation_context)
+        for delta in generate_response(st.session_state.conversation_context.messages()):
+            assistant_response += delta
+            placeholder.markdown(bot_bubble(assistant_response), unsafe_allow_html=True)
     
     # Add assistant response to history
     st.session_state.messages.append({"role": "assistant", "content": assistant_response})
-    st.session_state.conversation_context += f"Assistant: {assistant_response}\n"
+    st.session_state.conversation_context.add("assistant", assistant_response)
+    # Summarize older turns only now that the reply is on screen
+    st.session_state.conversation_context.compact()
     
     # Force a rerun to update the chat display
     st.rerun()
@@ -1,11 +1,14 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import numpy as np
 from datetime import datetime, timedelta
-from utils import call_llama_3, get_databricks_connection
+from utils import llama_3_completion, get_databricks_connection, coalesced_query, gather, submit
+from health_store import upsert_metrics, get_metrics_cache, query_metrics
+from chart_sampling import line_chart, FULL_WIDTH_PX
+from health_metrics import WINDOWS, BP_LEVELS, bp_category, save_summary, delete_summary
 from io import BytesIO
-import xlsxwriter
+from instrumentation import set_page
+
+set_page("Health Tracker")
 
 # Set page config
 st.set_page_config(page_title="Health Metrics Tracker", layout="wide")
@@ -35,47 +38,50 @@ st.markdown("""
 
 
 
+# Shared across sessions; re-reads only rows at or after the latest Date once the TTL passes
+metrics_cache = get_metrics_cache(get_databricks_connection, ttl=300)
+
 def save_to_databricks(data_df):
+    # Only the given (new) rows are written; re-submitting a Date replaces that day's reading
     try:
         with get_databricks_connection() as connection:
-            cursor = connection.cursor()
-            
-            # Clear existing data
-            # cursor.execute("DELETE FROM health_metrics")
-            
-            # Insert new data
-            for _, row in data_df.iterrows():
-                cursor.execute("""
-                    INSERT INTO workspace.AI_GLADIATORS.health_metrics 
-                    (Date, Weight, Blood_Pressure, Heart_Rate, BP_Systolic, BP_Diastolic)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (
-                    row['Date'],
-                    row['Weight'],
-                    row['Blood Pressure'],
-                    row['Heart Rate'],
-                    row['BP_Systolic'],
-                    row['BP_Diastolic']
-                ))
-            
-            connection.commit()
-        return True
+            upsert_metrics(connection, data_df)
     except Exception as e:
         st.error(f"Error saving to Databricks: {str(e)}")
         return False
 
-def load_from_databricks():
+    metrics_cache.apply_write(data_df)
+    clear_query_caches()
+    # The stored summary only speeds up the next cold start; the reading is saved either way
     try:
+        summary = metrics_cache.summary
         with get_databricks_connection() as connection:
-            query = "SELECT * FROM workspace.AI_GLADIATORS.health_metrics ORDER BY Date"
-            df = pd.read_sql(query, connection)
-            
-            # Rename columns to match application's format
-            df = df.rename(columns={
-                'Blood_Pressure': 'Blood Pressure',
-                'Heart_Rate': 'Heart Rate'
-            })
-            return df
+            save_summary(connection, summary)
+    except Exception as e:
+        st.warning(f"Saved the reading, but could not update the stored summary: {str(e)}")
+    return True
+
+# Trends tab windows (days back from today) and aggregation levels pushed down to SQL
+TREND_RANGES = {"Last 30 days": 30, "Last 90 days": 90, "Last year": 365, "All time": None}
+TREND_GRANULARITIES = {"Raw": None, "Daily": "day", "Weekly": "week", "Monthly": "month"}
+HISTORY_PAGE_SIZE = 50
+
+# Concurrent cache misses for the same window or page share one query
+@st.cache_data(ttl=300, show_spinner=False)
+def load_trend_window(start, granularity):
+    return coalesced_query(query_metrics, start=start, granularity=granularity)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_history_page(page):
+    return coalesced_query(query_metrics, limit=HISTORY_PAGE_SIZE, offset=page * HISTORY_PAGE_SIZE, descending=True)
+
+def clear_query_caches():
+    load_trend_window.clear()
+    load_history_page.clear()
+
+def load_from_databricks():
+    try:
+        return metrics_cache.load()
     except Exception as e:
         st.error(f"Error loading from Databricks: {str(e)}")
         return pd.DataFrame(columns=['Date', 'Weight', 'Blood Pressure', 'Heart Rate', 'BP_Systolic', 'BP_Diastolic'])
@@ -96,14 +102,8 @@ def validate_blood_pressure(systolic, diastolic):
     return True, ""
 
 def get_bp_category(systolic, diastolic):
-    if systolic < 120 and diastolic < 80:
-        return "Normal", "success"
-    elif systolic < 130 and diastolic < 80:
-        return "Elevated", "warning"
-    elif systolic < 140 or diastolic < 90:
-        return "Stage 1 Hypertension", "warning"
-    else:
-        return "Stage 2 Hypertension", "error"
+    category = bp_category(systolic, diastolic)
+    return category, BP_LEVELS[category]
 
 def clear_data():
     if st.session_state.health_data.empty:
@@ -115,8 +115,16 @@ def clear_data():
             cursor = connection.cursor()
             cursor.execute("DELETE FROM workspace.AI_GLADIATORS.health_metrics")
             connection.commit()
+        metrics_cache.reset()
+        clear_query_caches()
+        try:
+            with get_databricks_connection() as connection:
+                delete_summary(connection)
+        except Exception as e:
+            st.warning(f"Could not delete the stored summary: {str(e)}")
         
         # Clear session state
+        st.session_state.health_data_unsaved = False
         st.session_state.health_data = pd.DataFrame(
             columns=['Date', 'Weight', 'Blood Pressure', 'Heart Rate', 'BP_Systolic', 'BP_Diastolic']
         )
@@ -157,47 +165,151 @@ with col1:
                     'BP_Systolic': [bp_systolic],
                     'BP_Diastolic': [bp_diastolic]
                 })
-                st.session_state.health_data = pd.concat([st.session_state.health_data, new_data], ignore_index=True)
+                existing = st.session_state.health_data
+                st.session_state.health_data = pd.concat([existing[existing['Date'] != date], new_data], ignore_index=True)
                 
-                # Save to Databricks
-                if save_to_databricks(st.session_state.health_data):
+                # Save only the new measurement to Databricks
+                if save_to_databricks(new_data):
+                    st.session_state.health_data_unsaved = False
                     st.success("Data recorded successfully and saved to Databricks!")
                 else:
+                    st.session_state.health_data_unsaved = True
                     st.warning("Data recorded locally but failed to save to Databricks.")
             else:
                 st.error(bp_message)
 
-def is_databricks_table_empty():
-    try:
-        with get_databricks_connection() as connection:
-            query = "SELECT COUNT(*) as row_count FROM workspace.AI_GLADIATORS.health_metrics"
-            df = pd.read_sql(query, connection)
-            return df['row_count'][0] == 0
-    except Exception as e:
-        st.error(f"Error checking table in Databricks: {str(e)}")
-        return True
-    
-if not is_databricks_table_empty():
-    # Load data from Databricks into session state if not already loaded
-    if st.session_state.health_data.empty:
-        st.session_state.health_data = load_from_databricks()
-    # Continue with the rest of your code for displaying data
-else:
-    st.info("No data available in Databricks.")    
+# Sync with the cached table unless this session holds readings that failed to save
+if not st.session_state.get('health_data_unsaved', False):
+    st.session_state.health_data = load_from_databricks()
+if st.session_state.health_data.empty:
+    st.info("No data available in Databricks.")
+
 # Display visualizations in tabs
 if not st.session_state.health_data.empty:
     st.markdown("---")
     tab1, tab2, tab3, tab4 = st.tabs(["📈 Trends", "📊 Statistics", "🤖 AI Insights", "⚙️ Data Management"])
     
     with tab1:
+        range_cols = st.columns(2)
+        with range_cols[0]:
+            trend_range = st.selectbox("Range", list(TREND_RANGES), index=1)
+        with range_cols[1]:
+            trend_granularity = st.selectbox("Resolution", list(TREND_GRANULARITIES), index=1)
+
+        trend_days = TREND_RANGES[trend_range]
+        trend_start = datetime.now().date() - timedelta(days=trend_days) if trend_days else None
+    
+    with tab2:
+        st.subheader("Summary Statistics")
+        
+        # Running aggregates kept by the metrics cache; nothing here rescans the full history
+        summary = metrics_cache.summary
+        tracking_days = summary.tracking_days
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Tracking Period", f"{tracking_days} days")
+        with col2:
+            st.metric("Total Measurements", summary.count)
+        with col3:
+            measurement_frequency = tracking_days / summary.count if tracking_days > 0 else 0
+            st.metric("Avg. Measurement Frequency", f"{measurement_frequency:.1f} days")
+        
+        rolling = summary.rolling_means()
+        stats_df = pd.DataFrame(
+            {f"{window}-day mean": rolling[window] for window in WINDOWS if window in rolling}
+        )
+        stats_df["Trend (EWMA)"] = pd.Series(summary.ewma)
+        stats_df["Change per week"] = pd.Series({metric: slope * 7 for metric, slope in summary.slopes().items() if slope is not None})
+        stats_df = stats_df.rename(index={'BP_Systolic': 'Systolic BP', 'BP_Diastolic': 'Diastolic BP'})
+        st.dataframe(stats_df.round(2))
+
+        st.markdown("**Blood Pressure Categories**")
+        st.bar_chart(pd.Series(summary.category_counts, name="Readings"))
+        
+        # Show full history in an expandable section
+        history_expander = st.expander("View Full History")
+        with history_expander:
+            page_count = max(1, -(-len(st.session_state.health_data) // HISTORY_PAGE_SIZE))
+            history_page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+    
+    with tab3:
+        st.subheader("AI-Generated Health Insights")
+        insights = None
+        if summary.count >= 2:
+            # Features from the running aggregates rather than per-measurement diffs
+            latest = summary.latest
+            slopes = summary.slopes()
+            rolling_lines = "\n".join(
+                f"- {window}-day average: weight {means['Weight']:.1f} kg, BP {means['BP_Systolic']:.0f}/{means['BP_Diastolic']:.0f}, heart rate {means['Heart Rate']:.0f} bpm"
+                for window, means in rolling.items()
+            )
+            category_lines = ", ".join(f"{category}: {count}" for category, count in summary.category_counts.most_common())
+
+            def per_week(metric, precision):
+                slope = slopes[metric]
+                return f"{slope * 7:+.{precision}f}" if slope is not None else "n/a"
+            
+            insights_prompt = f"""
+            Based on the following health metrics trends:
+            
+            Current Statistics:
+            - Latest Weight: {latest['Weight']:.1f} kg
+            - Latest BP: {latest['BP_Systolic']:.0f}/{latest['BP_Diastolic']:.0f} ({bp_category(latest['BP_Systolic'], latest['BP_Diastolic'])})
+            - Latest Heart Rate: {latest['Heart Rate']:.0f} bpm
+            
+            Rolling Averages:
+{rolling_lines}
+            
+            Trends (fitted change per week):
+            - Weight: {per_week('Weight', 2)} kg
+            - Heart Rate: {per_week('Heart Rate', 1)} bpm
+            - Systolic BP: {per_week('BP_Systolic', 1)}
+            - Diastolic BP: {per_week('BP_Diastolic', 1)}
+            
+            Smoothed Current Levels (EWMA): weight {summary.ewma['Weight']:.1f} kg, BP {summary.ewma['BP_Systolic']:.0f}/{summary.ewma['BP_Diastolic']:.0f}, heart rate {summary.ewma['Heart Rate']:.0f} bpm
+            
+            Blood Pressure Readings by Category: {category_lines}
+            
+            Tracking Period: {tracking_days} days ({summary.count} measurements)
+            
+            Please provide:
+            1. A brief, friendly analysis of these trends
+            2. Any potential health concerns based on the data
+            3. Specific, actionable recommendations for improvement
+            4. Positive reinforcement for healthy trends
+            
+            Keep the response conversational and encouraging while being informative.
+            """
+            # Started now so it runs while the other tabs load and render; collected at the end of the page
+            insights = submit(lambda: llama_3_completion(insights_prompt, max_tokens=2000))
+            insights_container = st.container()
+        else:
+            st.info("Add at least two measurements to receive AI-generated insights about your health trends.")
+    
+    # The trend window and history page are independent queries: run them together
+    with st.spinner("Loading trends..."):
+        trend_data, history = gather(
+            lambda: load_trend_window(trend_start, TREND_GRANULARITIES[trend_granularity]),
+            lambda: load_history_page(history_page - 1),
+            return_exceptions=True
+        )
+    
+    with tab1:
+        if isinstance(trend_data, Exception):
+            st.error(f"Error loading trends from Databricks: {str(trend_data)}")
+            trend_data = st.session_state.health_data
+
+        if trend_data.empty:
+            st.info("No measurements in the selected range.")
+        # All three charts read this one frame; each is downsampled to its width without copying it
         col1, col2 = st.columns(2)
         
         with col1:
             st.subheader("Weight Trend")
-            fig_weight = px.line(st.session_state.health_data, 
-                               x='Date', 
-                               y='Weight',
-                               markers=True)
+            fig_weight = line_chart(trend_data, 
+                                    x='Date', 
+                                    y='Weight')
             fig_weight.update_layout(
                 yaxis_title="Weight (kg)",
                 hovermode='x unified',
@@ -207,10 +319,9 @@ if not st.session_state.health_data.empty:
         
         with col2:
             st.subheader("Heart Rate Trend")
-            fig_hr = px.line(st.session_state.health_data, 
-                           x='Date', 
-                           y='Heart Rate',
-                           markers=True)
+            fig_hr = line_chart(trend_data, 
+                                x='Date', 
+                                y='Heart Rate')
             fig_hr.update_layout(
                 yaxis_title="Heart Rate (bpm)",
                 hovermode='x unified',
@@ -219,12 +330,11 @@ if not st.session_state.health_data.empty:
             st.plotly_chart(fig_hr, use_container_width=True)
         
         st.subheader("Blood Pressure Trend")
-        bp_data = st.session_state.health_data.copy()
-        fig_bp = px.line(bp_data, 
-                        x='Date', 
-                        y=['BP_Systolic', 'BP_Diastolic'],
-                        markers=True,
-                        labels={'BP_Systolic': 'Systolic', 'BP_Diastolic': 'Diastolic'})
+        fig_bp = line_chart(trend_data, 
+                            x='Date', 
+                            y=['BP_Systolic', 'BP_Diastolic'],
+                            width_px=FULL_WIDTH_PX,
+                            labels={'BP_Systolic': 'Systolic', 'BP_Diastolic': 'Diastolic'})
         fig_bp.update_layout(
             yaxis_title="Blood Pressure (mmHg)",
             hovermode='x unified',
@@ -242,80 +352,11 @@ if not st.session_state.health_data.empty:
         fig_bp.add_hline(y=80, line_dash="dash", line_color="green", annotation_text="Normal Diastolic")
         st.plotly_chart(fig_bp, use_container_width=True)
     
-    with tab2:
-        st.subheader("Summary Statistics")
-        
-        # Calculate basic statistics
-        stats_df = st.session_state.health_data
-        stats_df = stats_df.drop(['BP_Systolic', 'BP_Diastolic'], axis=1)
-        
-        # Add more detailed statistics
-        latest_date = st.session_state.health_data['Date'].max()
-        earliest_date = st.session_state.health_data['Date'].min()
-        tracking_days = (latest_date - earliest_date).days
-        
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("Tracking Period", f"{tracking_days} days")
-        with col2:
-            st.metric("Total Measurements", len(st.session_state.health_data))
-        with col3:
-            measurement_frequency = tracking_days / len(st.session_state.health_data) if tracking_days > 0 else 0
-            st.metric("Avg. Measurement Frequency", f"{measurement_frequency:.1f} days")
-        
-        st.dataframe(stats_df.round(2))
-        
-        # Show full history in an expandable section
-        with st.expander("View Full History"):
-            st.dataframe(
-                st.session_state.health_data.sort_values('Date', ascending=False),
-                use_container_width=True
-            )
-    
-    with tab3:
-        st.subheader("AI-Generated Health Insights")
-        if len(st.session_state.health_data) >= 2:
-            # Calculate trends for more meaningful insights
-            weight_trend = st.session_state.health_data['Weight'].diff().mean()
-            hr_trend = st.session_state.health_data['Heart Rate'].diff().mean()
-            sys_trend = st.session_state.health_data['BP_Systolic'].diff().mean()
-            dia_trend = st.session_state.health_data['BP_Diastolic'].diff().mean()
-            
-            prompt = f"""
-            Based on the following health metrics trends:
-            
-            Current Statistics:
-            - Latest Weight: {st.session_state.health_data['Weight'].iloc[-1]:.1f} kg
-            - Latest BP: {st.session_state.health_data['Blood Pressure'].iloc[-1]}
-            - Latest Heart Rate: {st.session_state.health_data['Heart Rate'].iloc[-1]} bpm
-            
-            Trends (average change per measurement):
-            - Weight: {weight_trend:+.2f} kg
-            - Heart Rate: {hr_trend:+.1f} bpm
-            - Systolic BP: {sys_trend:+.1f}
-            - Diastolic BP: {dia_trend:+.1f}
-            
-            Tracking Period: {tracking_days} days
-            
-            Please provide:
-            1. A brief, friendly analysis of these trends
-            2. Any potential health concerns based on the data
-            3. Specific, actionable recommendations for improvement
-            4. Positive reinforcement for healthy trends
-            
-            Keep the response conversational and encouraging while being informative.
-            """
-            
-            try:
-                with st.spinner("Generating health insights..."):
-                    response = call_llama_3(prompt, max_tokens=2000)
-                if response:
-                    st.markdown(response)
-            except Exception as e:
-                st.error("Unable to generate AI insights at this time.")
-                st.error(f"Error: {str(e)}")
-        else:
-            st.info("Add at least two measurements to receive AI-generated insights about your health trends.")
+    with history_expander:
+        if isinstance(history, Exception):
+            st.error(f"Error loading history from Databricks: {str(history)}")
+            history = st.session_state.health_data.sort_values('Date', ascending=False)
+        st.dataframe(history, use_container_width=True)
     
     with tab4:
         st.subheader("Data Management")
@@ -358,3 +399,15 @@ if not st.session_state.health_data.empty:
         
         if st.button("Clear All Data", type="primary"):
             clear_data()
+    
+    # Only the insights tab waits for the model
+    if insights is not None:
+        with insights_container:
+            try:
+                with st.spinner("Generating health insights..."):
+                    response = insights.result()
+                if response:
+                    st.markdown(response)
+            except Exception as e:
+                st.error("Unable to generate AI insights at this time.")
+                st.error(f"Error: {str(e)}")
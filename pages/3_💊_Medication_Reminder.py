@@ -1,25 +1,20 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, time
-from utils import call_llama_3, get_databricks_connection
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
-from streamlit_autorefresh import st_autorefresh
+from datetime import time
+from utils import call_llama_3, get_databricks_connection, coalesced_query, get_reminder_scheduler, config
+from instrumentation import set_page
 
+set_page("Medication Reminder")
 
-db_credentials = st.secrets["db_credentials"]
 
+EMAIL_RECIPIENT = config["EMAIL_RECIPIENT"]
 
-if 'EMAIL_SENDER' not in st.session_state:
-    st.session_state.EMAIL_SENDER = db_credentials["EMAIL_SENDER"]
-if 'EMAIL_RECIPIENT' not in st.session_state:
-    st.session_state.EMAIL_RECIPIENT = db_credentials["EMAIL_RECIPIENT"]
-if 'SENDGRID_API' not in st.session_state:
-    st.session_state.SENDGRID_API = db_credentials["SENDGRID_API"]
+# The process-wide scheduler (already running once any page has loaded utils), or None when it runs externally
+scheduler = get_reminder_scheduler()
 
-SENDGRID_API_KEY = st.session_state.SENDGRID_API
-EMAIL_SENDER = st.session_state.EMAIL_SENDER
-EMAIL_RECIPIENT = st.session_state.EMAIL_RECIPIENT
+def notify_schedule_changed():
+    if scheduler is not None:
+        scheduler.notify_changed()
 
 # Page configuration
 st.set_page_config(page_title="Medication Reminder", page_icon="💊", layout="wide")
@@ -33,25 +28,16 @@ def insert_medication(med_name, dosage, frequency, med_time, user_email):
                 "INSERT INTO workspace.AI_GLADIATORS.medication_reminders (medication, dosage, frequency, time, user_email) VALUES (?, ?, ?, ?, ?)",
                 (med_name, dosage, frequency, med_time.strftime("%H:%M"), user_email)
             )
+    notify_schedule_changed()
+
+def fetch_medications(connection, user_email):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT medication, dosage, frequency, time FROM workspace.AI_GLADIATORS.medication_reminders WHERE user_email = ?", (user_email,))
+        return cursor.fetchall()
 
 def get_medications(user_email):
-    with get_databricks_connection() as connection:
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT medication, dosage, frequency, time FROM workspace.AI_GLADIATORS.medication_reminders WHERE user_email = ?", (user_email,))
-            return pd.DataFrame(cursor.fetchall(), columns=['Medication', 'Dosage', 'Frequency', 'Time'])
-
-def send_email(subject, body):
-    message = Mail(
-        from_email=EMAIL_SENDER,
-        to_emails=EMAIL_RECIPIENT,
-        subject=subject,
-        plain_text_content=body)
-    try:
-        sg = SendGridAPIClient(SENDGRID_API_KEY)
-        response = sg.send(message)
-        st.success(f"Email sent successfully. Status code: {response.status_code}")
-    except Exception as e:
-        st.error(f"An error occurred while sending the email: {e}")
+    # Tabs loading the same address at once share one query
+    return pd.DataFrame(coalesced_query(fetch_medications, user_email), columns=['Medication', 'Dosage', 'Frequency', 'Time'])
 
 # Input form for adding medications
 with st.expander("Add New Medication", expanded=False):
@@ -76,25 +62,13 @@ if not medications.empty:
     st.subheader("Your Medications")
     st.dataframe(medications, use_container_width=True)
 
-    # Reminder logic with automatic checks
-    st_autorefresh(interval=60000)  # Refresh every minute
-
-    now = datetime.now().time()
-    reminders = []
-    
-    for _, med in medications.iterrows():
-        med_time = datetime.strptime(med['Time'], "%H:%M").time()
-        
-        # Check if current time matches medication time
-        if now.hour == med_time.hour and now.minute == med_time.minute:
-            reminder = f"Time to take {med['Medication']} - {med['Dosage']}!"
-            reminders.append(reminder)
-            send_email("Medication Reminder", reminder)
-
-    if reminders:
-        st.subheader("Current Reminders")
-        for reminder in reminders:
-            st.markdown(f'<div class="reminder warning">{reminder}</div>', unsafe_allow_html=True)
+    # Upcoming reminders, delivered by email by the background scheduler
+    if scheduler is not None:
+        upcoming = scheduler.upcoming(EMAIL_RECIPIENT)
+        if upcoming:
+            st.subheader("Upcoming Reminders")
+            for fire_at, reminder in upcoming:
+                st.markdown(f'<div class="reminder warning">{fire_at.strftime("%a %H:%M")} - {reminder}</div>', unsafe_allow_html=True)
 
     # Llama-generated advice
     if st.button("Get AI-Generated Medication Advice"):
@@ -110,6 +84,7 @@ if not medications.empty:
         with get_databricks_connection() as connection:
             with connection.cursor() as cursor:
                 cursor.execute("DELETE FROM workspace.AI_GLADIATORS.medication_reminders WHERE user_email = ?", (EMAIL_RECIPIENT,))
+        notify_schedule_changed()
         st.success("All medications cleared!")
 
 else:
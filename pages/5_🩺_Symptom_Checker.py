@@ -1,5 +1,8 @@
 import streamlit as st
 from utils import call_llama_3
+from instrumentation import set_page
+
+set_page("Symptom Checker")
 
 st.title("Symptom Checker")
 
@@ -25,7 +28,7 @@ else:
 if st.button("Check Symptoms"):
     if all_symptoms:
         prompt = f"Given the following symptoms: {', '.join(all_symptoms)}, provide a brief, friendly explanation of possible conditions and general advice. Remember to suggest consulting a healthcare professional."
-        response = call_llama_3(prompt,max_tokens=2000)
+        response = call_llama_3(prompt, max_tokens=2000, cache=True)
         if response:
             st.write(response)
     else:
@@ -1,9 +1,11 @@
 import streamlit as st 
-import os
-import fitz  # PyMuPDF
-from PIL import Image
-import pytesseract
-from utils import call_llama_3
+from utils import stream_llama_3, EXTRACTION_CACHE_OPTIONS
+from food_extraction import extract_text, get_extraction_cache
+from ingredient_index import get_ingredient_index, format_findings, looks_like_ingredient_list, mostly_known
+from food_prompt import InspectorPrompt
+from instrumentation import set_page
+
+set_page("Food Inspector")
 
 icons = {"assistant": "🤖", "user": "human"}
 
@@ -30,52 +32,35 @@ for message in st.session_state.messages_f:
 # Clear chat history function
 def clear_chat_history():
     st.session_state.messages_f = [{"role": "assistant", "content": "Hi, I'm your food inspector AI! I'll help you understand food package ingredients and identify any hazardous or banned contents. Ask me anything."}]
+    st.session_state.inspector_prompt.clear()
 
 SYSTEM_PROMPT = """
 You're a food inspector. Understand all ingredients used in packaged food.
 Identify if any ingredient is hazardous to health or banned in any country. Specifically mention countries that banned the ingredients, and warn of possible health issues if consumed excessively.
 """
 
-# Text extraction functions
-def extract_text_from_pdf(file):
-    """Extract text from a PDF file"""
-    text = ""
-    with fitz.open(stream=file.read(), filetype="pdf") as doc:
-        for page in doc:
-            text += page.get_text()
-    return text
-
-def extract_text_from_image(file):
-    """Extract text from an image file"""
-    image = Image.open(file)
-    text = pytesseract.image_to_string(image)
-    return text
-
-# Function for generating response with call_llama_3
-def generate_response():
-    prompt = [SYSTEM_PROMPT]
-    for dict_message in st.session_state.messages_f:
-        if dict_message["role"] == "user":
-            prompt.append("user\n" + dict_message["content"])
-        else:
-            prompt.append("assistant\n" + dict_message["content"])
-    
-    prompt_str = "\n".join(prompt)
-    response = call_llama_3(prompt_str, max_tokens=2000)
-    return response
+if "inspector_prompt" not in st.session_state:
+    st.session_state.inspector_prompt = InspectorPrompt(SYSTEM_PROMPT)
+
+# Function for generating a streamed response with stream_llama_3; latest replaces the last user message.
+# The prompt keeps the newest document in full and trims older ones to stay within the model's context.
+def generate_response(latest=None):
+    prompt_str = st.session_state.inspector_prompt.build(st.session_state.messages_f, latest)
+    return stream_llama_3(prompt_str, max_tokens=2000)
 
 # File uploader
 uploaded_file = st.file_uploader("Upload a PDF, TXT, or Image file containing food package contents", type=["pdf", "txt", "png", "jpg", "jpeg"])
 
-if uploaded_file:
-    if uploaded_file.type == "application/pdf":
-        prompt = extract_text_from_pdf(uploaded_file)
-    elif uploaded_file.type == "text/plain":
-        prompt = str(uploaded_file.read(), "utf-8")
-    elif uploaded_file.type in ["image/png", "image/jpeg", "image/jpg"]:
-        prompt = extract_text_from_image(uploaded_file)
+# Uploads already turned into a chat message; the file stays in the uploader across reruns
+if "processed_uploads" not in st.session_state:
+    st.session_state.processed_uploads = set()
+
+if uploaded_file and uploaded_file.file_id not in st.session_state.processed_uploads:
+    st.session_state.processed_uploads.add(uploaded_file.file_id)
+    # Identical content (e.g. the same label uploaded again) is served from the cache instead of re-running OCR
+    prompt = extract_text(uploaded_file.getvalue(), uploaded_file.type, cache=get_extraction_cache(**EXTRACTION_CACHE_OPTIONS))
     
-    st.session_state.messages_f.append({"role": "user", "content": prompt})
+    st.session_state.messages_f.append({"role": "user", "content": prompt, "kind": "document"})
     with st.chat_message("user", avatar="human"):
         st.write(prompt)
 
@@ -85,11 +70,33 @@ if prompt := st.chat_input(placeholder="Type your food package contents"):
     with st.chat_message("user", avatar="human"):
         st.write(prompt)
 
+# Ask the model only about ingredients the local hazard index does not cover; a typed message is kept as the question
+def remainder_prompt(known, unknown, question=None):
+    prompt = (f"These ingredients were already checked: {', '.join(entry['name'] for entry in known)}. "
+              f"Analyze only the remaining ingredients: {', '.join(unknown)}")
+    return f"{question}\n\n{prompt}" if question else prompt
+
 # Generate a new response if the last message is from the user
 if st.session_state.messages_f[-1]["role"] != "assistant":
+    message = st.session_state.messages_f[-1]
+    latest = message["content"]
+    is_document = message.get("kind") == "document"
+    known, unknown = [], []
+    # Uploaded labels always go through the index; typed messages only when they read as an ingredient list
+    if is_document or looks_like_ingredient_list(latest):
+        known, unknown = get_ingredient_index().analyze(latest)
+        if not is_document and not mostly_known(latest, unknown):
+            known, unknown = [], []
+
     with st.chat_message("assistant", avatar="🤖"):
-        response = generate_response()
-        st.write(response)
-    st.session_state.messages_f.append({"role": "assistant", "content": response})
+        findings = format_findings(known)
+        if findings:
+            st.markdown(findings)
+        response = ""
+        if not known:
+            response = st.write_stream(generate_response())
+        elif unknown:
+            response = st.write_stream(generate_response(remainder_prompt(known, unknown, None if is_document else latest)))
+    st.session_state.messages_f.append({"role": "assistant", "content": "\n\n".join(part for part in (findings, response) if part)})
 
 st.button('Clear', on_click=clear_chat_history)
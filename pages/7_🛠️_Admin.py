@@ -0,0 +1,104 @@
+import streamlit as st
+import pandas as pd
+from utils import get_db_pool, get_response_cache
+from instrumentation import REGISTRY, set_page
+
+set_page("Admin")
+
+st.set_page_config(page_title="Admin", page_icon="🛠️", layout="wide")
+
+st.title("Admin: Performance Metrics")
+st.markdown("Latency, errors, token usage and cache/pool usage recorded by this server process since it started (or since the last reset).")
+
+# Pool and cache gauges
+pool_stats = get_db_pool().stats()
+cache_stats = get_response_cache().stats()
+collected = REGISTRY.collect()
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    st.metric("DB Connections In Use", f"{pool_stats['in_use']} / {pool_stats['max_size']}")
+with col2:
+    st.metric("DB Connections Open", pool_stats["size"])
+with col3:
+    st.metric("LLM Cache Hit Rate", f"{cache_stats['hit_rate']:.0%}")
+with col4:
+    extraction = collected.get("extraction_cache")
+    st.metric("Extraction Cache Hit Rate", f"{extraction['hit_rate']:.0%}" if extraction else "n/a")
+
+# Reminder emails sent by the notification queue of this process (absent when the scheduler runs elsewhere)
+notifications = collected.get("notifications")
+if notifications:
+    st.subheader("Reminder Emails")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Sent", notifications["sent"], help=f"{notifications['throughput_per_min']:.1f} per minute")
+    with col2:
+        st.metric("Pending", notifications["pending"])
+    with col3:
+        st.metric("Coalesced / Deduplicated", f"{notifications['coalesced']} / {notifications['deduplicated']}")
+    with col4:
+        st.metric("Retried / Failed", f"{notifications['retried']} / {notifications['failed']}")
+
+# Call latencies per call site and page
+st.subheader("Call Latency")
+calls = pd.DataFrame(REGISTRY.snapshot())
+if calls.empty:
+    st.info("No calls recorded yet. Use the other pages and come back.")
+else:
+    pages = ["All"] + sorted(page or "(none)" for page in calls["page"].unique())
+    selected_page = st.selectbox("Page", pages)
+    if selected_page != "All":
+        calls = calls[calls["page"] == ("" if selected_page == "(none)" else selected_page)]
+    st.dataframe(calls.round(1), use_container_width=True, hide_index=True)
+
+    by_site = calls.groupby("site").apply(lambda rows: (rows["p95_ms"] * rows["calls"]).sum() / rows["calls"].sum())
+    st.markdown("**Call-weighted p95 latency by call site (ms)**")
+    st.bar_chart(by_site)
+
+# Token usage and cache lookups
+counters = REGISTRY.counters()
+token_rows = [
+    {"counter": name.replace("_total", ""), **dict(labels), "value": value}
+    for (name, labels), value in counters.items() if name.endswith("tokens_total")
+]
+cache_rows = [
+    {**dict(labels), "lookups": value}
+    for (name, labels), value in counters.items() if name == "cache_requests_total"
+]
+col1, col2 = st.columns(2)
+with col1:
+    st.subheader("Tokens")
+    if token_rows:
+        tokens = pd.DataFrame(token_rows).pivot_table(index=["site", "page"], columns="counter", values="value", aggfunc="sum")
+        st.dataframe(tokens, use_container_width=True)
+    else:
+        st.info("No model calls recorded yet.")
+with col2:
+    st.subheader("Cache Lookups")
+    if cache_rows:
+        lookups = pd.DataFrame(cache_rows).pivot_table(index=["cache", "page"], columns="result", values="lookups", aggfunc="sum", fill_value=0)
+        st.dataframe(lookups, use_container_width=True)
+    else:
+        st.info("No cache lookups recorded yet.")
+
+# Identical concurrent LLM/SQL requests served by one upstream call
+st.subheader("Coalesced Requests")
+flights = pd.DataFrame([
+    {"group": name[len("singleflight_"):], **stats}
+    for name, stats in collected.items() if name.startswith("singleflight_")
+])
+if flights.empty:
+    st.info("No coalescible calls recorded yet.")
+else:
+    st.dataframe(flights.round(2), use_container_width=True, hide_index=True)
+
+# Raw export, the same text served on /metrics when METRICS_PORT is set
+st.subheader("Prometheus Export")
+metrics_text = REGISTRY.render()
+st.download_button("Download metrics", data=metrics_text, file_name="metrics.txt", mime="text/plain")
+with st.expander("View metrics text"):
+    st.code(metrics_text, language="text")
+
+if st.button("Reset Metrics"):
+    REGISTRY.reset()
+    st.rerun()
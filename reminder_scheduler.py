@@ -0,0 +1,168 @@
+import heapq
+import itertools
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+MEDICATION_REMINDERS_TABLE = "workspace.AI_GLADIATORS.medication_reminders"
+
+
+def next_occurrence(med_time, after):
+    """First datetime strictly after ``after`` whose time of day is ``med_time``"""
+    candidate = datetime.combine(after.date(), med_time)
+    if candidate <= after:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def reminder_text(schedule):
+    return f"Time to take {schedule['medication']} - {schedule['dosage']}!"
+
+
+def load_schedules(connect):
+    """Read every medication schedule in one query"""
+    with connect() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT medication, dosage, frequency, time, user_email FROM {MEDICATION_REMINDERS_TABLE}")
+            return [
+                {"medication": medication, "dosage": dosage, "frequency": frequency,
+                 "time": datetime.strptime(med_time, "%H:%M").time(), "user_email": user_email}
+                for medication, dosage, frequency, med_time, user_email in cursor.fetchall()
+            ]
+
+
+def queue_deliver(notifier, subject="Medication Reminder"):
+    """Delivery callback handing reminders to a notifications.NotificationQueue"""
+    def deliver(user_email, reminders):
+        for reminder in reminders:
+            notifier.enqueue(user_email, subject, reminder)
+
+    return deliver
+
+
+class ReminderScheduler:
+    """Fires medication reminders from a min-heap of next fire times.
+
+    ``load`` returns the schedules (see load_schedules) and is called once at
+    start, whenever notify_changed() is called, and every ``reload_interval``
+    seconds to pick up changes made by other processes. Due reminders are
+    passed to ``deliver(user_email, reminders)``, one call per recipient.
+    """
+
+    def __init__(self, load, deliver, reload_interval=300.0, clock=datetime.now):
+        self._load = load
+        self._deliver = deliver
+        self.reload_interval = reload_interval
+        self._clock = clock
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._changed = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        # Reminders up to a minute old still fire on start, matching the old per-minute check
+        self._last_check = clock() - timedelta(minutes=1)
+        self._next_reload = None
+
+    def notify_changed(self):
+        """Ask the scheduler to reload schedules, e.g. after a medication was added or removed"""
+        self._changed.set()
+
+    def reload(self):
+        schedules = self._load()
+        heap = [(next_occurrence(s["time"], self._last_check), next(self._seq), s) for s in schedules]
+        heapq.heapify(heap)
+        with self._lock:
+            self._heap = heap
+        self._next_reload = self._clock() + timedelta(seconds=self.reload_interval)
+
+    def upcoming(self, user_email=None):
+        """Next fire time and reminder text for each schedule, soonest first"""
+        with self._lock:
+            entries = sorted(self._heap)
+        return [(fire_at, reminder_text(s)) for fire_at, _, s in entries
+                if user_email is None or s["user_email"] == user_email]
+
+    def run_due(self):
+        """Deliver every reminder due by now and schedule its next occurrence"""
+        now = self._clock()
+        due = defaultdict(list)
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                fire_at, _, schedule = heapq.heappop(self._heap)
+                due[schedule["user_email"]].append(reminder_text(schedule))
+                heapq.heappush(self._heap, (next_occurrence(schedule["time"], fire_at), next(self._seq), schedule))
+        self._last_check = now
+        for user_email, reminders in due.items():
+            try:
+                self._deliver(user_email, reminders)
+            except Exception:
+                logger.exception("Failed to deliver reminders to %s", user_email)
+
+    def _seconds_until_next(self):
+        now = self._clock()
+        wake = self._next_reload
+        with self._lock:
+            if self._heap and self._heap[0][0] < wake:
+                wake = self._heap[0][0]
+        return max(0.0, (wake - now).total_seconds())
+
+    def run(self):
+        while not self._stop.is_set():
+            if self._next_reload is None or self._changed.is_set() or self._clock() >= self._next_reload:
+                self._changed.clear()
+                try:
+                    self.reload()
+                except Exception:
+                    logger.exception("Failed to load medication schedules")
+                    self._next_reload = self._clock() + timedelta(seconds=60)
+            self.run_due()
+            self._changed.wait(timeout=self._seconds_until_next())
+
+    def start(self):
+        """Run the scheduler on a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="reminder-scheduler", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        self._changed.set()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler(load, deliver, **options):
+    """Return the process-wide scheduler, starting its thread on first use"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = ReminderScheduler(load, deliver, **options)
+                _scheduler.start()
+    return _scheduler
+
+
+def main():
+    """Run the scheduler as a standalone process using the app's secrets (or environment)"""
+    from config import get_config
+    from notifications import NotificationQueue, SendGridTransport
+
+    logging.basicConfig(level=logging.INFO)
+    config = get_config()
+
+    scheduler = ReminderScheduler(
+        lambda: load_schedules(config.sql_connect),
+        queue_deliver(NotificationQueue(SendGridTransport(config["SENDGRID_API"], config["EMAIL_SENDER"])))
+    )
+    scheduler.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import threading
+from concurrent.futures import Future
+
+from instrumentation import REGISTRY, current_page
+
+
+class SingleFlight:
+    """Coalesce identical concurrent calls into one.
+
+    The first caller for a key runs the call; callers arriving with the same
+    key while it is in flight wait for it and receive the same result (or
+    exception). Nothing is kept afterwards, so the next call runs afresh.
+    Results are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            REGISTRY.inc("coalesced_requests_total", group=self.name, page=current_page())
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            # Interrupted by something other than an error (e.g. a script rerun): waiters see CancelledError
+            if not future.done():
+                future.cancel()
+
+    def stats(self):
+        with self._lock:
+            total = self.calls + self.coalesced
+            return {
+                "in_flight": len(self._in_flight),
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "coalesced_rate": self.coalesced / total if total else 0.0
+            }
+
+
+_groups = {}
+_groups_lock = threading.Lock()
+
+
+def get_single_flight(name):
+    """Return the process-wide single-flight group of this name, creating it on first use"""
+    group = _groups.get(name)
+    if group is None:
+        with _groups_lock:
+            group = _groups.get(name)
+            if group is None:
+                group = _groups[name] = SingleFlight(name)
+                REGISTRY.register_collector(f"singleflight_{name}", group.stats)
+    return group
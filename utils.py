@@ -1,59 +1,113 @@
+import inspect
+import logging
+import threading
 import requests
 import streamlit as st
-import os
-from dotenv import load_dotenv
-from databricks import sql
-# Load environment variables
-# load_dotenv()
+from config import get_config
+from llm_client import get_client
+from llm_cache import get_cache, make_key
+from db_pool import get_pool
+from conversation import estimate_tokens, message_tokens
+from instrumentation import timed, record_tokens, record_cache, start_metrics_server
+from singleflight import get_single_flight
+import async_io
 
-db_credentials = st.secrets["db_credentials"]
+# Read once per process from the [db_credentials] secrets (or the environment) and shared by all sessions
+config = get_config()
 
+# # Databricks API configuration
+DATABRICKS_API_TOKEN = config.databricks_token
+DATABRICKS_MODEL_ENDPOINT = config.serving_endpoint
+DATABRICKS_SERVER_HOSTNAME = config.databricks_host
+DATABRICKS_HTTP_PATH = config.databricks_http_path
 
-if 'DATABRICKS_HOST' not in st.session_state:
-    st.session_state.DATABRICKS_HOST = db_credentials["DATABRICKS_HOST"]
-if 'DATABRICKS_HTTP_PATH' not in st.session_state:
-    st.session_state.DATABRICKS_HTTP_PATH = db_credentials["DATABRICKS_HTTP_PATH"]
-if 'DATABRICKS_TOKEN' not in st.session_state:
-    st.session_state.DATABRICKS_TOKEN = db_credentials["DATABRICKS_TOKEN"]
-if 'DATABRICKS_SERVING_ENDPOINT' not in st.session_state:
-    st.session_state.DATABRICKS_SERVING_ENDPOINT = db_credentials["DATABRICKS_SERVING_ENDPOINT"]
-if 'DATABRICKS_SERVING_ENDPOINT_NAME' not in st.session_state:
-    st.session_state.DATABRICKS_SERVING_ENDPOINT_NAME = db_credentials["DATABRICKS_SERVING_ENDPOINT_NAME"]
 
+# Tunables for the shared serving-endpoint client (optional secrets)
+LLM_CLIENT_OPTIONS = {
+    "pool_size": int(config.get("LLM_POOL_SIZE", 10)),
+    "connect_timeout": float(config.get("LLM_CONNECT_TIMEOUT", 5)),
+    "read_timeout": float(config.get("LLM_READ_TIMEOUT", 120)),
+    "max_retries": int(config.get("LLM_MAX_RETRIES", 3)),
+}
+
+
+def get_llm_client():
+    return get_client(DATABRICKS_MODEL_ENDPOINT, DATABRICKS_API_TOKEN, **LLM_CLIENT_OPTIONS)
+
+
+# Process-wide cache for deterministic prompts; set LLM_CACHE_PATH to persist it across restarts
+LLM_CACHE_OPTIONS = {
+    "max_size": int(config.get("LLM_CACHE_SIZE", 256)),
+    "ttl": float(config.get("LLM_CACHE_TTL", 3600)),
+    "path": config.get("LLM_CACHE_PATH"),
+}
+
+
+def get_response_cache():
+    return get_cache(**LLM_CACHE_OPTIONS)
+
+
+# Food Inspector OCR/PDF text keyed by content hash; set EXTRACTION_CACHE_PATH to keep it on disk
+EXTRACTION_CACHE_OPTIONS = {
+    "max_size": int(config.get("EXTRACTION_CACHE_SIZE", 128)),
+    "ttl": None,
+    "path": config.get("EXTRACTION_CACHE_PATH"),
+}
+
+
+# Accept either a plain prompt string or a list of role-tagged chat messages
+def to_messages(prompt):
+    if isinstance(prompt, str):
+        return [{"role": "user", "content": prompt}]
+    return list(prompt)
 
-# # Databricks API configuration
-DATABRICKS_API_TOKEN = st.session_state.DATABRICKS_TOKEN
-DATABRICKS_MODEL_ENDPOINT = st.session_state.DATABRICKS_SERVING_ENDPOINT
-DATABRICKS_SERVER_HOSTNAME = st.session_state.DATABRICKS_HOST
-DATABRICKS_HTTP_PATH = st.session_state.DATABRICKS_HTTP_PATH
+
+# Llama 3 completion without Streamlit error reporting; raises on failure, safe to use from worker threads.
+# With cache_if, only responses it accepts are cached, so an unusable answer is requested again next time.
+def llama_3_completion(prompt, max_tokens=100, cache=False, cache_if=None):
+    key = make_key(prompt, max_tokens)
+    if cache:
+        cached = get_response_cache().get(key)
+        record_cache("llm", cached is not None)
+        if cached is not None:
+            return cached
+
+    def complete():
+        messages = to_messages(prompt)
+        with timed("llm.chat"):
+            response = get_llm_client().chat(messages, max_tokens=max_tokens)
+        record_tokens("llm.chat", sum(map(message_tokens, messages)), estimate_tokens(response or ""))
+        if cache and (cache_if is None or cache_if(response)):
+            get_response_cache().set(key, response)
+        return response
+
+    # Sessions sending the same normalized prompt at once (e.g. Home's welcome message) share one request
+    return get_single_flight("llm").do(key, complete)
 
 
 # Function to call Databricks Llama 3 model
-def call_llama_3(prompt, max_tokens=100):
-    headers = {
-        "Authorization": f"Bearer {DATABRICKS_API_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "messages": [
-            {"role": "user", "content": prompt}
-        ],
-        "max_tokens": max_tokens
-    }
-    
+def call_llama_3(prompt, max_tokens=100, cache=False, cache_if=None):
     try:
-        response = requests.post(
-            DATABRICKS_MODEL_ENDPOINT,
-            headers=headers,
-            json=data,
-            verify=False
-        )
-        response.raise_for_status()
-        return response.json().get("choices", [{}])[0].get("message", {}).get("content", "No response content.")
+        return llama_3_completion(prompt, max_tokens=max_tokens, cache=cache, cache_if=cache_if)
     except requests.exceptions.RequestException as e:
         st.error(f"Error calling Databricks API: {e}")
         return None
-    
+
+
+# Streaming variant of call_llama_3, yields text as the model produces it
+def stream_llama_3(prompt, max_tokens=100):
+    messages = to_messages(prompt)
+    completion = []
+
+    try:
+        with timed("llm.stream"):
+            for delta in get_llm_client().stream_chat(messages, max_tokens=max_tokens):
+                completion.append(delta)
+                yield delta
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error calling Databricks API: {e}")
+    record_tokens("llm.stream", sum(map(message_tokens, messages)), estimate_tokens("".join(completion)))
+
 
 # Apply custom CSS
 def local_css(file_name):
@@ -61,9 +115,94 @@ def local_css(file_name):
         st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
 
 
+def open_databricks_connection():
+    return config.sql_connect()
+
+
+# Tunables for the shared SQL warehouse connection pool (optional secrets)
+DB_POOL_OPTIONS = {
+    "min_size": int(config.get("DB_POOL_MIN_SIZE", 1)),
+    "max_size": int(config.get("DB_POOL_MAX_SIZE", 10)),
+    "idle_timeout": float(config.get("DB_POOL_IDLE_TIMEOUT", 300)),
+}
+
+
+def get_db_pool():
+    return get_pool(open_databricks_connection, **DB_POOL_OPTIONS)
+
+
+# Checks a connection out of the shared pool; leaving the `with` block returns it
 def get_databricks_connection():
-    return sql.connect(
-        server_hostname=DATABRICKS_SERVER_HOSTNAME,
-        http_path=DATABRICKS_HTTP_PATH,
-        access_token=DATABRICKS_API_TOKEN
-    )  
+    with timed("db.checkout"):
+        return get_db_pool().checkout()
+
+
+# Wrap a zero-argument callable so it runs with this session's script context on an executor thread,
+# letting st.cache_data and st.* calls behave as on the page. The thread's previous context is put back
+# afterwards, since the shared executor runs work for every session.
+def with_script_ctx(call):
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None or not callable(call) or inspect.iscoroutinefunction(call):
+        return call
+
+    def run():
+        thread = threading.current_thread()
+        previous = getattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+        add_script_run_ctx(thread, ctx)
+        try:
+            return call()
+        finally:
+            setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, previous)
+    return run
+
+
+# Run a page's independent remote calls (zero-argument callables or coroutines) concurrently,
+# so the page waits for the slowest one instead of their sum. Results come back in order;
+# with return_exceptions=True a failed call yields its exception instead of raising.
+def gather(*calls, return_exceptions=False):
+    return async_io.gather(*map(with_script_ctx, calls), return_exceptions=return_exceptions)
+
+
+# Start a slow call in the background now and collect it later with .result(),
+# so the rest of the page renders while it runs
+def submit(call):
+    return async_io.submit(with_script_ctx(call))
+
+
+# Run func(connection, *args) on a pooled connection; identical concurrent queries share one round trip.
+# func must only read, and callers must not mutate the shared result.
+def coalesced_query(func, *args, **kwargs):
+    def query():
+        with get_databricks_connection() as connection:
+            return func(connection, *args, **kwargs)
+
+    key = (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+    return get_single_flight("sql").do(key, query)
+
+
+# Medication reminders are emailed by one scheduler thread per server process, started below on the
+# first script run of any page rather than when someone opens the Medication Reminder page.
+# Set REMINDER_SCHEDULER_EXTERNAL when `python reminder_scheduler.py` runs as its own process instead.
+def get_reminder_scheduler():
+    if config.flag("REMINDER_SCHEDULER_EXTERNAL"):
+        return None
+    from reminder_scheduler import get_scheduler, load_schedules, queue_deliver
+    from notifications import get_notification_queue, SendGridTransport
+
+    notifier = get_notification_queue(lambda: SendGridTransport(config["SENDGRID_API"], config["EMAIL_SENDER"]))
+    return get_scheduler(lambda: load_schedules(get_databricks_connection), queue_deliver(notifier))
+
+
+if config.get("SENDGRID_API") and config.get("EMAIL_SENDER"):
+    try:
+        get_reminder_scheduler()
+    except Exception:
+        # Pages still load; the Medication Reminder page surfaces the error when it asks again
+        logging.getLogger(__name__).exception("Could not start the medication reminder scheduler")
+
+# Prometheus metrics on http://127.0.0.1:<METRICS_PORT>/metrics when the secret is set
+if config.get("METRICS_PORT"):
+    start_metrics_server(int(config["METRICS_PORT"]))